@@ -1,5 +1,7 @@
+import argparse
 import json
 import os
+import subprocess
 from pathlib import Path
 
 
@@ -36,7 +38,103 @@ def parse_config(config_path):
     return framework_name, models_path
 
 
+SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv"}
+
+
+def list_config_files(root):
+    """All config.json files under root, skipping what git ignores when root is in a git repo."""
+    try:
+        output = subprocess.run(
+            [
+                "git",
+                "ls-files",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "config.json",
+                "**/config.json",
+            ],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        output = None
+    if output is not None:
+        paths = [Path(root) / line for line in sorted(set(output.splitlines())) if line]
+        return [p for p in paths if not SKIP_DIRS.intersection(p.parts) and p.is_file()]
+
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        if "config.json" in filenames:
+            paths.append(Path(dirpath) / "config.json")
+    return paths
+
+
+def discover_train_configs(root=None):
+    """Find every config.json that declares framework.name and files.models.
+
+    Returns a list of (framework name, models path, config path) tuples.
+    """
+    root = Path.cwd() if root is None else Path(root)
+    found = []
+    for config_path in list_config_files(root):
+        try:
+            framework_name, models_path = parse_config(config_path)
+        except Exception:
+            continue
+        found.append((framework_name, models_path, config_path))
+    return found
+
+
+def write_matrix(root=None):
+    """Writes every framework found in the repo to GITHUB_OUTPUT as a job matrix."""
+    entries = []
+    seen = set()
+    for framework_name, models_path, config_path in discover_train_configs(root):
+        if (framework_name, models_path) in seen:
+            continue
+        seen.add((framework_name, models_path))
+        if root is None:
+            config_path = config_path.relative_to(Path.cwd())
+        entries.append(
+            {
+                "framework": framework_name,
+                "models_path": models_path,
+                "config": str(config_path),
+            }
+        )
+        print(f"Found {framework_name}: {models_path} ({config_path})")
+    matrix = json.dumps({"include": entries}, separators=(",", ":"))
+
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a") as f:
+            f.write(f"matrix={matrix}\n")
+            f.write(f"count={len(entries)}\n")
+    else:
+        # For local testing
+        print(f"matrix={matrix}")
+    return entries
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Find frameworks and model files of the repo."
+    )
+    parser.add_argument(
+        "--matrix",
+        action="store_true",
+        help="Scan the whole repo and write all frameworks to GITHUB_OUTPUT as a JSON matrix",
+    )
+    args = parser.parse_args()
+    if args.matrix:
+        write_matrix()
+        return
+
     try:
         # Check if environment variables are already set
         framework_name = os.environ.get("FRAMEWORK")
@@ -1,4 +1,6 @@
 import datetime
+import gzip
+import hashlib
 import json
 import os
 import random
@@ -9,20 +11,22 @@ import sys
 import tarfile
 import time
 from pathlib import Path
-from typing import Dict, List, Literal
+from typing import Dict, List, Literal, Tuple
 
 import git
+from giturlparse import parse as parse_git_url
 from github import Auth, ContentFile, Github, GithubException, GitRelease
 from supervisely.cli.release.release import (
     cd,
     delete_directory,
     get_app_from_instance,
-    get_appKey,
-    get_created_at,
     upload_archive,
 )
 from supervisely.io.fs import dir_exists, list_files_recursively, remove_dir
 
+import release_history
+from slyignore import load_ignore_matcher
+
 
 class ReleaseType:
     RELEASE = "release"
@@ -50,6 +54,102 @@ def gh_release_is_published(release: GitRelease.GitRelease):
     return not (release.prerelease or release.draft)
 
 
+class GitMetadataIndex:
+    """
+    Tags with their dates, refs, the first commit and the remote url read from git
+    in a single pass. App keys and release dates are then served from memory.
+    """
+
+    def __init__(self, repo: git.Repo):
+        self.repo = repo
+        self.refresh()
+
+    def refresh(self):
+        self.tags = {}
+        self.refs = {}
+        self._app_keys = {}
+        output = self.repo.git.for_each_ref(
+            "--format=%(refname)%00%(objectname)%00%(*objectname)%00%(creatordate:unix)",
+            "refs/tags",
+            "refs/heads",
+            "refs/remotes",
+        )
+        for line in output.splitlines():
+            refname, objectname, peeled, created = line.split("\0")
+            # annotated tags peel to the commit, lightweight ones point to it directly
+            commit = peeled or objectname
+            self.refs[refname] = commit
+            if refname.startswith("refs/tags/"):
+                created_at = None
+                if created:
+                    created_at = datetime.datetime.utcfromtimestamp(
+                        int(created)
+                    ).isoformat()
+                self.tags[refname[len("refs/tags/") :]] = {
+                    "commit": commit,
+                    "created_at": created_at,
+                }
+        # rev-list lists roots newest first, the last one is the first commit of HEAD
+        roots = self.repo.git.rev_list("--max-parents=0", "HEAD").split()
+        self.first_commit = roots[-1] if roots else None
+        self.remote_urls = {r.name: r.url for r in self.repo.remotes}
+        # remote that lazily serves objects missing from a blob-filtered clone
+        self.promisor_remote = self._get_config("extensions.partialclone")
+        if self.promisor_remote is None:
+            promisors = self._get_config(r"remote\..*\.promisor", "--get-regexp")
+            for line in (promisors or "").splitlines():
+                key, value = line.split(" ", 1)
+                if value == "true":
+                    self.promisor_remote = key[len("remote.") : -len(".promisor")]
+                    break
+        self.sparse_checkout = self._get_config("core.sparseCheckout") == "true"
+
+    def _get_config(self, key, mode="--get"):
+        try:
+            return self.repo.git.config(mode, key)
+        except git.GitCommandError:
+            return None
+
+    def get_repo_url(self, slug):
+        try:
+            remote_name = self.repo.active_branch.tracking_branch().remote_name
+            return self.remote_urls[remote_name]
+        except:
+            repo_url = f"https://github.com/{slug}"
+            print(f"Cannot define remote branch. Set repo_url to {repo_url}")
+            return repo_url
+
+    def get_created_at(self, tag_name):
+        if tag_name is None or tag_name not in self.tags:
+            return None
+        return self.tags[tag_name]["created_at"]
+
+    def get_app_key(self, subapp_path, repo_url):
+        """Same key as supervisely.cli.release.release.get_appKey without walking history."""
+        cache_key = (subapp_path, repo_url)
+        if cache_key not in self._app_keys:
+            url = parse_git_url(repo_url).url2https
+            url = url.replace("https://", "").replace(".git", "").lower()
+            key_string = url + "_" + self.first_commit
+            appKey = hashlib.md5(key_string.encode("utf-8")).hexdigest()
+            if subapp_path is not None:
+                appKey += "_" + hashlib.md5(subapp_path.encode("utf-8")).hexdigest()
+            appKey += (
+                "_" + hashlib.md5(self.first_commit[:7].encode("utf-8")).hexdigest()
+            )
+            self._app_keys[cache_key] = appKey
+        return self._app_keys[cache_key]
+
+
+_git_indexes: Dict[str, GitMetadataIndex] = {}
+
+
+def get_git_index(repo: git.Repo) -> GitMetadataIndex:
+    if repo.working_dir not in _git_indexes:
+        _git_indexes[repo.working_dir] = GitMetadataIndex(repo)
+    return _git_indexes[repo.working_dir]
+
+
 def get_config(app_path):
     if app_path == "root":
         app_path = None
@@ -145,7 +245,270 @@ def print_results(results):
     return success_count == len(results)
 
 
-def archive_application(repo: git.Repo, config, slug, archive_only_config=False):
+def save_release_history(slug, release_type, release_version, results):
+    path = release_history.get_history_path()
+    try:
+        release_history.append_run(path, slug, release_type, release_version, results)
+    except Exception as e:
+        print(f"WARNING: Could not save release history to {path}: {e}")
+
+
+def get_index_entries(repo: git.Repo) -> Dict[str, Tuple[str, str]]:
+    """Tracked files of the superproject: path -> (mode, blob sha)."""
+    entries = {}
+    for line in repo.git.ls_files("-s").splitlines():
+        info, path = line.split("\t", 1)
+        mode, sha, _ = info.split(" ")
+        if mode != "160000":  # submodules are not blobs
+            entries[path] = (mode, sha)
+    return entries
+
+
+def fetch_missing_blobs(repo: git.Repo, shas) -> Tuple[int, int]:
+    """
+    Fetches blobs absent from a partial clone in one request instead of letting git
+    fetch them lazily one by one. Returns the number and total size of fetched blobs.
+    """
+    index = get_git_index(repo)
+    if index.promisor_remote is None or not shas:
+        return 0, 0
+    output = repo.git.rev_list("--objects", "--missing=print", "--no-walk", "HEAD")
+    missing = {line[1:] for line in output.splitlines() if line.startswith("?")}
+    to_fetch = sorted(missing.intersection(shas))
+    if not to_fetch:
+        return 0, 0
+    subprocess.run(
+        [
+            "git",
+            "-c",
+            "fetch.negotiationAlgorithm=noop",
+            "fetch",
+            "--no-tags",
+            "--no-write-fetch-head",
+            "--recurse-submodules=no",
+            "--filter=blob:none",
+            "--stdin",
+            index.promisor_remote,
+        ],
+        input="\n".join(to_fetch).encode("utf-8"),
+        cwd=repo.working_dir,
+        check=True,
+    )
+    sizes = subprocess.run(
+        ["git", "cat-file", "--batch-check=%(objectsize)"],
+        input="\n".join(to_fetch).encode("utf-8"),
+        cwd=repo.working_dir,
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout.split()
+    fetched_bytes = sum(int(size) for size in sizes if size.isdigit())
+    print(
+        f"INFO: Fetched {len(to_fetch)} missing blobs ({fetched_bytes} bytes) "
+        f"from {index.promisor_remote}"
+    )
+    return len(to_fetch), fetched_bytes
+
+
+def is_archived_path(rel_path: str, matcher=None, archive_only_config=False) -> bool:
+    """Whether a tracked file goes into an app archive, see `archive_application`."""
+    if archive_only_config and "config.json" not in os.path.basename(rel_path):
+        return False
+    return matcher is None or not matcher.is_excluded(rel_path)
+
+
+def prepare_checkout(
+    repo: git.Repo, subapp_paths: List[str], archive_only_config=False
+):
+    """
+    Makes a sparse and/or blob-filtered checkout usable for releasing the given subapps:
+    adds the subapp directories (and directories of files their configs reference) to
+    the sparse checkout, so configs, READMEs and modal templates can be read, and fetches
+    in one batch the blobs of the files that go into at least one of the archives.
+    Archives hold the whole repository, so only files excluded from every archive
+    (ARCHIVE_ONLY_CONFIG, .slyignore) are not fetched. Full checkouts are left untouched.
+    """
+    index = get_git_index(repo)
+    if not index.sparse_checkout and index.promisor_remote is None:
+        return
+    print(
+        f"INFO: Partial clone: {index.promisor_remote is not None}. "
+        f"Sparse checkout: {index.sparse_checkout}"
+    )
+    if index.sparse_checkout:
+        subapp_dirs = [p for p in subapp_paths if p is not None]
+        if subapp_dirs:
+            repo.git.sparse_checkout("add", *subapp_dirs)
+        referenced_dirs = set()
+        for subapp_path in subapp_paths:
+            for path in get_subapp_referenced_paths(subapp_path, repo):
+                parent = os.path.dirname(path)
+                if parent:
+                    referenced_dirs.add(parent)
+        if referenced_dirs:
+            repo.git.sparse_checkout("add", *sorted(referenced_dirs))
+        print(
+            f"INFO: Sparse checkout paths: {repo.git.sparse_checkout('list').split()}"
+        )
+    all_entries = get_index_entries(repo)
+    matchers = [
+        load_ignore_matcher(repo.working_dir, p, get_subapp_referenced_paths(p, repo))
+        for p in subapp_paths
+    ]
+    entries = {
+        p: e
+        for p, e in all_entries.items()
+        if any(is_archived_path(p, m, archive_only_config) for m in matchers)
+    }
+    if len(entries) < len(all_entries):
+        print(
+            f"INFO: {len(all_entries) - len(entries)} files are excluded from every archive, "
+            "their blobs are not fetched"
+        )
+    count, size = fetch_missing_blobs(repo, {sha for _, sha in entries.values()})
+    if count == 0:
+        print("INFO: All blobs needed for the archives are available locally")
+
+
+def add_index_blob(tar: tarfile.TarFile, repo: git.Repo, arcname, mode, sha):
+    """Adds a tracked file that is not in the working tree (sparse checkout) from its blob."""
+    _, _, size, stream = repo.git.stream_object_data(sha)
+    tarinfo = tarfile.TarInfo(arcname)
+    if mode == "120000":
+        tarinfo.type = tarfile.SYMTYPE
+        tarinfo.linkname = stream.read().decode("utf-8")
+        tar.addfile(normalize_tarinfo(tarinfo))
+        return
+    tarinfo.size = size
+    tarinfo.mode = 0o755 if mode == "100755" else 0o644
+    tar.addfile(normalize_tarinfo(tarinfo), stream)
+
+
+ARCHIVE_MTIME = 315532800  # 1980-01-01, oldest timestamp every archive tool accepts
+
+
+def normalize_tarinfo(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
+    """Strip host specific metadata so identical trees produce identical archives."""
+    tarinfo.mtime = ARCHIVE_MTIME
+    tarinfo.uid = 0
+    tarinfo.gid = 0
+    tarinfo.uname = ""
+    tarinfo.gname = ""
+    if tarinfo.isfile():
+        tarinfo.mode = 0o755 if tarinfo.mode & 0o111 else 0o644
+    return tarinfo
+
+
+ARCHIVE_SIZE_REPORT_TOP = 10
+
+
+class ArchiveSizeError(Exception):
+    """Files of an app archive exceed the archive size budget."""
+
+
+def get_archive_file_sizes(repo: git.Repo, arcnames, index_blobs) -> Dict[str, int]:
+    """Uncompressed size of every file that goes into the archive. Symlinks count as 0."""
+    sizes = {}
+    for arcname, path in arcnames.items():
+        if path.is_file():
+            sizes[arcname] = 0 if path.is_symlink() else path.stat().st_size
+        elif arcname in index_blobs:
+            sizes[arcname] = 0
+    shas = {sha for mode, sha in index_blobs.values() if mode != "120000"}
+    if shas:
+        blob_sizes = {}
+        output = subprocess.run(
+            ["git", "cat-file", "--batch-check=%(objectname) %(objectsize)"],
+            input="\n".join(shas).encode("utf-8"),
+            cwd=repo.working_dir,
+            stdout=subprocess.PIPE,
+            check=True,
+        ).stdout.decode("utf-8")
+        for line in output.splitlines():
+            sha, _, size = line.partition(" ")
+            if size.isdigit():
+                blob_sizes[sha] = int(size)
+        for arcname, (mode, sha) in index_blobs.items():
+            if arcname in sizes and mode != "120000":
+                sizes[arcname] = blob_sizes.get(sha, 0)
+    return sizes
+
+
+def get_largest_entries(sizes: Dict[str, int], top=ARCHIVE_SIZE_REPORT_TOP):
+    """Top files and directories by size, paths relative to the app folder."""
+    files = {}
+    dirs = {}
+    for arcname, size in sizes.items():
+        path = arcname.split("/", 1)[-1]
+        files[path] = size
+        parts = path.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            dir_path = "/".join(parts[:i]) + "/"
+            dirs[dir_path] = dirs.get(dir_path, 0) + size
+    largest_files = sorted(files.items(), key=lambda x: (-x[1], x[0]))[:top]
+    largest_dirs = sorted(dirs.items(), key=lambda x: (-x[1], x[0]))[:top]
+    return largest_files, largest_dirs
+
+
+def print_largest_entries(sizes: Dict[str, int], top=ARCHIVE_SIZE_REPORT_TOP):
+    largest_files, largest_dirs = get_largest_entries(sizes, top)
+    print("Largest files:")
+    for path, size in largest_files:
+        print(f"  {release_history.format_size(size).rjust(10)}  {path}")
+    if largest_dirs:
+        print("Largest directories:")
+        for path, size in largest_dirs:
+            print(f"  {release_history.format_size(size).rjust(10)}  {path}")
+
+
+def exclude_ignored_files(
+    file_paths: List[Path],
+    working_dir_path: Path,
+    subapp_path=None,
+    repo: git.Repo = None,
+):
+    """Drops the files matched by .slyignore rules and prints how many and how large they are."""
+    matcher = load_ignore_matcher(
+        working_dir_path, subapp_path, get_subapp_referenced_paths(subapp_path, repo)
+    )
+    if matcher is None:
+        return file_paths
+    rel_paths = {path.relative_to(working_dir_path).as_posix() for path in file_paths}
+    for path in sorted(matcher.keep & rel_paths):
+        if matcher.matches(path):
+            print(f"WARNING: .slyignore rules match {path}, it is archived anyway")
+    kept = []
+    excluded_count = 0
+    excluded_size = 0
+    for path in file_paths:
+        if is_archived_path(path.relative_to(working_dir_path).as_posix(), matcher):
+            kept.append(path)
+            continue
+        excluded_count += 1
+        # blobs outside of a sparse checkout are not fetched just to be measured
+        if path.is_file() and not path.is_symlink():
+            excluded_size += path.stat().st_size
+    print(
+        f"INFO: .slyignore excluded {excluded_count} of {len(file_paths)} files "
+        f"({release_history.format_size(excluded_size)})"
+    )
+    return kept
+
+
+def archive_application(
+    repo: git.Repo,
+    config,
+    slug,
+    archive_only_config=False,
+    size_budget=None,
+    subapp_path=None,
+):
+    """
+    Packs the tracked files of the current directory into an archive, except the ones
+    excluded by the .slyignore files of the repository and the subapp.
+    The largest files and directories are printed before compressing. `size_budget`
+    is the limit in bytes for the uncompressed files, ArchiveSizeError is raised
+    before compressing if it is exceeded.
+    """
     archive_folder = "".join(random.choice(string.ascii_letters) for _ in range(5))
     os.mkdir(archive_folder)
     file_paths = [
@@ -177,25 +540,316 @@ def archive_application(repo: git.Repo, config, slug, archive_only_config=False)
                     ]
                 )
         archive_path = archive_folder + "/archive.tar"
-        write_mode = "w"
+        compress = False
     else:
         archive_path = archive_folder + "/archive.tar.gz"
-        write_mode = "w:gz"
+        compress = True
     if archive_only_config:
-        file_paths = [p for p in file_paths if "config.json" in p.name]
-    with tarfile.open(archive_path, write_mode) as tar:
-        for path in file_paths:
-            if path.is_file():
-                tar.add(
-                    path.absolute(),
-                    Path(app_folder_name).joinpath(path.relative_to(working_dir_path)),
-                )
+        file_paths = [
+            p
+            for p in file_paths
+            if is_archived_path(p.name, archive_only_config=archive_only_config)
+        ]
+    file_paths = exclude_ignored_files(file_paths, working_dir_path, subapp_path, repo)
+    # sorted, deduplicated entries keep the archive byte-identical between runs
+    arcnames = {
+        Path(app_folder_name)
+        .joinpath(path.relative_to(working_dir_path))
+        .as_posix(): path
+        for path in file_paths
+    }
+    # files outside of a sparse checkout are read from their blobs
+    index_blobs = {}
+    if get_git_index(repo).sparse_checkout:
+        entries = get_index_entries(repo)
+        for arcname, path in arcnames.items():
+            rel_path = path.relative_to(working_dir_path).as_posix()
+            if rel_path in entries and not path.is_file() and not path.is_symlink():
+                index_blobs[arcname] = entries[rel_path]
+        fetch_missing_blobs(repo, {sha for _, sha in index_blobs.values()})
+    sizes = get_archive_file_sizes(repo, arcnames, index_blobs)
+    total_size = sum(sizes.values())
+    print(
+        f"INFO: Archive content: {len(sizes)} files, "
+        f"{release_history.format_size(total_size)} uncompressed"
+    )
+    print_largest_entries(sizes)
+    if size_budget and total_size > size_budget:
+        delete_directory(archive_folder)
+        if should_remove_dir is not None:
+            remove_dir(should_remove_dir)
+        raise ArchiveSizeError(
+            f"Archive content is {release_history.format_size(total_size)}, "
+            f"over the budget of {release_history.format_size(size_budget)}"
+        )
+    with open(archive_path, "wb") as raw:
+        # gzip header embeds a timestamp and file name unless they are pinned
+        fileobj = (
+            gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+            if compress
+            else raw
+        )
+        try:
+            with tarfile.open(fileobj=fileobj, mode="w") as tar:
+                for arcname in sorted(arcnames):
+                    path = arcnames[arcname]
+                    if path.is_file():
+                        tar.add(path, arcname, filter=normalize_tarinfo)
+                    elif arcname in index_blobs:
+                        add_index_blob(tar, repo, arcname, *index_blobs[arcname])
+        finally:
+            if compress:
+                fileobj.close()
     if should_remove_dir is not None:
         # remove gui folder if it was rendered
         remove_dir(should_remove_dir)
     return archive_path
 
 
+def get_archive_digests_path() -> Path:
+    return release_history.get_state_dir().joinpath("archive_digests.json")
+
+
+def compute_release_digest(archive_path, **metadata) -> str:
+    """Digest of the archive bytes and the metadata uploaded alongside it."""
+    h = hashlib.sha256()
+    with open(archive_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    h.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_archive_digests() -> Dict:
+    path = get_archive_digests_path()
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"WARNING: Could not read archive digests from {path}: {e}")
+        return {}
+
+
+def get_last_archive_digest(server_address, appKey, release_version):
+    digests = load_archive_digests()
+    record = (
+        digests.get(remove_scheme(server_address).rstrip("/"), {})
+        .get(appKey, {})
+        .get(release_version)
+    )
+    if record is None:
+        return None
+    return record.get("digest")
+
+
+def save_archive_digest(server_address, appKey, release_version, digest, commit):
+    path = get_archive_digests_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digests = load_archive_digests()
+        server_digests = digests.setdefault(
+            remove_scheme(server_address).rstrip("/"), {}
+        )
+        server_digests.setdefault(appKey, {})[release_version] = {
+            "digest": digest,
+            "commit": commit,
+            "uploaded_at": datetime.datetime.utcnow().isoformat(),
+        }
+        # write to a temp file first so concurrent jobs never read a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(digests, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"WARNING: Could not save archive digest to {path}: {e}")
+
+
+UPLOAD_REFS_PREFIX = "refs/sly-uploads"
+
+
+def get_upload_ref(subapp_path, release_version) -> str:
+    """Ref in the app repository pointing at the last commit uploaded for a subapp and branch."""
+    subapp_key = hashlib.sha1(
+        normalize_subapp_path(subapp_path).encode("utf-8")
+    ).hexdigest()
+    return f"{UPLOAD_REFS_PREFIX}/{subapp_key[:12]}/{release_version}"
+
+
+def get_upload_refs(repo: git.Repo) -> Dict[str, str]:
+    """Upload refs on origin: ref -> commit. Shared by all runners, unlike the digest store."""
+    try:
+        output = repo.git.ls_remote("origin", f"{UPLOAD_REFS_PREFIX}/*")
+    except git.GitCommandError as e:
+        print(f"WARNING: Could not list upload refs on origin: {e}")
+        return {}
+    refs = {}
+    for line in output.splitlines():
+        commit, ref = line.split("\t", 1)
+        refs[ref] = commit
+    return refs
+
+
+def save_upload_ref(repo: git.Repo, subapp_path, release_version, commit):
+    ref = get_upload_ref(subapp_path, release_version)
+    try:
+        repo.git.push("--force", "--no-verify", "origin", f"{commit}:{ref}")
+    except git.GitCommandError as e:
+        print(f"WARNING: Could not push {ref} to origin: {e}")
+
+
+def get_previous_release_tag(repo: git.Repo, release_version: str):
+    index = get_git_index(repo)
+    previous = None
+    for tag_name in index.tags:
+        version = tag_name
+        if version.startswith("sly-release-"):
+            version = version[len("sly-release-") :]
+        if not is_valid_version(version):
+            continue
+        if compare_semver(version, release_version) >= 0:
+            continue
+        if previous is None or compare_semver(version, previous[1]) > 0:
+            previous = (tag_name, version)
+    return None if previous is None else previous[0]
+
+
+def get_changed_files(repo: git.Repo, base_commit):
+    """Paths changed between base_commit and HEAD or None if the base is unknown."""
+    try:
+        output = repo.git.diff("--name-only", "--no-renames", base_commit, "HEAD")
+    except git.GitCommandError:
+        return None
+    return [p for p in output.splitlines() if p]
+
+
+def is_path_under(path: str, prefix: str) -> bool:
+    prefix = prefix.strip("/")
+    return prefix == "" or path == prefix or path.startswith(prefix + "/")
+
+
+def get_subapp_referenced_paths(subapp_path, repo: git.Repo = None) -> List[str]:
+    """Files referenced by the subapp config.json, relative to the repository root."""
+    paths = []
+    try:
+        config = get_config(subapp_path)
+    except Exception:
+        if repo is None:
+            return paths
+        # the subapp may be outside of the sparse checkout, read config from HEAD
+        config_path = (
+            "config.json" if subapp_path is None else f"{subapp_path}/config.json"
+        )
+        try:
+            config = json.loads(repo.git.show(f"HEAD:{config_path}"))
+        except Exception:
+            return paths
+    if config.get("modal_template"):
+        paths.append(config["modal_template"])
+    for file_path in (config.get("files") or {}).values():
+        if isinstance(file_path, str):
+            paths.append(file_path)
+    return [p.strip("/") for p in paths]
+
+
+def get_affected_subapps(
+    changed_files,
+    subapp_paths,
+    shared_paths,
+    repo: git.Repo = None,
+    root_only_paths=None,
+):
+    """
+    Maps changed paths onto subapps. A path belongs to the deepest subapp directory
+    containing it and to every subapp whose config.json references it. Shared paths
+    affect all subapps. Every archive holds the whole repository, so paths outside every
+    subapp directory affect all subapps too, except root only paths that affect only
+    the root app.
+    """
+    root_only_paths = root_only_paths or []
+    referenced_paths = {p: get_subapp_referenced_paths(p, repo) for p in subapp_paths}
+    subapp_dirs = sorted(
+        [p for p in subapp_paths if p is not None], key=len, reverse=True
+    )
+    affected = set()
+    for path in changed_files:
+        if any(is_path_under(path, shared) for shared in shared_paths):
+            return list(subapp_paths)
+        owners = {
+            p
+            for p in subapp_paths
+            if any(is_path_under(path, ref) for ref in referenced_paths[p])
+        }
+        subapp_dir = next((d for d in subapp_dirs if is_path_under(path, d)), None)
+        if subapp_dir is not None:
+            owners.add(subapp_dir)
+        if owners:
+            affected.update(owners)
+            continue
+        if not any(is_path_under(path, root_only) for root_only in root_only_paths):
+            return list(subapp_paths)
+        if None in subapp_paths:
+            affected.add(None)
+    return [p for p in subapp_paths if p in affected]
+
+
+def detect_changed_subapps(
+    repo: git.Repo,
+    subapp_paths: List[str],
+    release_type: str,
+    release_version: str,
+    shared_paths: List[str],
+    root_only_paths: List[str] = None,
+):
+    """
+    Releases: diff HEAD against the previous release tag.
+    Branch releases: diff HEAD against the commit of the last upload of each subapp,
+    read from the upload refs on origin (see `save_upload_ref`).
+    Subapps without a known base are always released.
+    """
+    if release_type == ReleaseType.RELEASE:
+        base = get_previous_release_tag(repo, release_version)
+        if base is None:
+            print("INFO: No previous release tag found. Releasing all subapps.")
+            return subapp_paths
+        bases = {p: base for p in subapp_paths}
+    elif release_type == ReleaseType.RELEASE_BRANCH:
+        upload_refs = get_upload_refs(repo)
+        bases = {
+            p: upload_refs.get(get_upload_ref(p, release_version)) for p in subapp_paths
+        }
+    else:
+        return subapp_paths
+
+    changed_files_cache = {}
+    changed = []
+    for subapp_path in subapp_paths:
+        subapp_name = "__ROOT_APP__" if subapp_path is None else subapp_path
+        base = bases[subapp_path]
+        if base is None:
+            print(f"INFO: {subapp_name}: no previous upload found, will be released")
+            changed.append(subapp_path)
+            continue
+        if base not in changed_files_cache:
+            changed_files_cache[base] = get_changed_files(repo, base)
+        changed_files = changed_files_cache[base]
+        if changed_files is None:
+            print(
+                f"INFO: {subapp_name}: {base} is not in the repository, will be released"
+            )
+            changed.append(subapp_path)
+            continue
+        if subapp_path in get_affected_subapps(
+            changed_files, subapp_paths, shared_paths, repo, root_only_paths
+        ):
+            print(f"INFO: {subapp_name}: changed since {base[:12]}, will be released")
+            changed.append(subapp_path)
+        else:
+            print(f"INFO: {subapp_name}: unchanged since {base[:12]}, skipping")
+    return changed
+
+
 def release(
     server_address,
     api_token,
@@ -212,11 +866,26 @@ def release(
     created_at=None,
     share_app=False,
     archive_only_config=False,
+    archive_size_budget=None,
     files=None,
+    skip_if_unchanged=False,
+    stats=None,
 ):
+    """Returns the upload response or None if the upload was skipped as unchanged.
+
+    Phase durations and the archive size are written into `stats` if it is given.
+    """
+    if stats is None:
+        stats = {}
+    durations = stats.setdefault("durations", {})
     if created_at is None:
-        created_at = get_created_at(repo, release_version)
-    archive_path = archive_application(repo, config, slug, archive_only_config)
+        created_at = get_git_index(repo).get_created_at(release_version)
+    start = time.monotonic()
+    archive_path = archive_application(
+        repo, config, slug, archive_only_config, archive_size_budget, subapp_path
+    )
+    durations["archive"] = time.monotonic() - start
+    stats["archive_size"] = os.path.getsize(archive_path)
     release = {
         "name": release_name,
         "version": release_version,
@@ -224,6 +893,22 @@ def release(
     if created_at is not None:
         release["createdAt"] = created_at
     try:
+        digest = compute_release_digest(
+            archive_path,
+            release_name=release_name,
+            config=config,
+            readme=readme,
+            modal_template=modal_template,
+            slug=slug,
+            subapp_path=subapp_path,
+            share_app=share_app,
+            files=files,
+        )
+        if skip_if_unchanged and digest == get_last_archive_digest(
+            server_address, appKey, release_version
+        ):
+            return None
+        start = time.monotonic()
         response = upload_archive(
             archive_path,
             server_address,
@@ -239,8 +924,13 @@ def release(
             share_app,
             files,
         )
+        durations["upload"] = time.monotonic() - start
     finally:
         delete_directory(os.path.dirname(archive_path))
+    if response.status_code == 200:
+        save_archive_digest(
+            server_address, appKey, release_version, digest, repo.head.commit.hexsha
+        )
     return response
 
 
@@ -257,10 +947,13 @@ def do_release(
     created_at,
     share,
     archive_only_config=False,
+    archive_size_budget=None,
+    skip_if_unchanged=False,
 ):
     app_name = "Unknown"
+    stats = {}
     try:
-        appKey = get_appKey(repo, subapp_path, repo_url)
+        appKey = get_git_index(repo).get_app_key(subapp_path, repo_url)
         config = get_config(subapp_path)
         readme = get_readme(subapp_path)
         modal_template = get_modal_template(config)
@@ -293,17 +986,42 @@ def do_release(
             subapp_path=subapp_path,
             share_app=share,
             archive_only_config=archive_only_config,
+            archive_size_budget=archive_size_budget,
             files=files,
+            skip_if_unchanged=skip_if_unchanged,
+            stats=stats,
         )
 
+        if response is None:
+            return {
+                "App name": app_name,
+                "App path": subapp_path,
+                "Release": f"{release_version} ({release_name})",
+                "Status code": 200,
+                "Message": "Archive is unchanged since the last upload",
+                "Skipped": True,
+                "Stats": stats,
+            }
+
         return {
             "App name": app_name,
             "App path": subapp_path,
             "Release": f"{release_version} ({release_name})",
             "Status code": response.status_code,
             "Message": response.json(),
+            "Stats": stats,
         }
 
+    except ArchiveSizeError as e:
+        # not retried: the same files will not fit on the next attempt
+        return {
+            "App name": app_name,
+            "App path": subapp_path,
+            "Release": f"{release_version} ({release_name})",
+            "Status code": 413,
+            "Message": str(e),
+            "Stats": stats,
+        }
     except Exception as e:
         return {
             "App name": app_name,
@@ -311,6 +1029,7 @@ def do_release(
             "Release": f"{release_version} ({release_name})",
             "Status code": None,
             "Message": str(e),
+            "Stats": stats,
         }
 
 
@@ -348,9 +1067,14 @@ def do_release_with_retry(
     """Wrapper around do_release with retry logic for transient errors."""
     result = None
     delay = retry_delay
+    start = time.monotonic()
     for attempt in range(1, max_retries + 1):
         result = do_release(**kwargs)
+        result["Attempts"] = attempt
+        result["Stats"].setdefault("durations", {})["total"] = time.monotonic() - start
         if result["Status code"] == 200:
+            if result.get("Skipped"):
+                print("[Skipped: unchanged since last upload]\n")
             return result
         if is_already_released(result):
             print("[Skipped: already released]\n")
@@ -401,6 +1125,7 @@ def add_tag(repo: git.Repo, tag_name: str, tag_message: str, commit_sha):
     )
     repo.create_tag(tag_name, message=tag_message, ref=commit_sha)
     repo.git.push("origin", tag_name)
+    get_git_index(repo).refresh()
     return True
 
 
@@ -437,6 +1162,7 @@ def run_release(
     release_version: str,
     release_description: str,
     archive_only_config=False,
+    archive_size_budget=None,
 ):
     if not is_valid_version(release_version):
         print("Release version is not valid. Should be in semver format (v1.2.3).")
@@ -444,7 +1170,7 @@ def run_release(
 
     results = []
     for subapp_path in subapp_paths:
-        app_key = get_appKey(repo, subapp_path, repo_url)
+        app_key = get_git_index(repo).get_app_key(subapp_path, repo_url)
         is_published, err_msg = check_app_is_published(
             prod_server_address=prod_server_address,
             prod_api_token=prod_api_token,
@@ -490,6 +1216,7 @@ def run_release(
                     created_at=None,
                     share=share,
                     archive_only_config=archive_only_config,
+                    archive_size_budget=archive_size_budget,
                 )
             )
             if results[-1]["Status code"] == 200:
@@ -531,6 +1258,7 @@ def run_release(
                 }
             )
     all_success = print_results(results)
+    save_release_history(slug, ReleaseType.RELEASE, release_version, results)
     if all_success:
         return 0
     return 1
@@ -549,6 +1277,9 @@ def run_release_branch(
     release_version: str,
     release_description: str,
     archive_only_config=False,
+    archive_size_budget=None,
+    skip_unchanged_upload=False,
+    changed_only=False,
 ):
     if is_valid_version(release_version):
         print("Branch name is not valid. Should not be in semver format (v1.2.3).")
@@ -560,7 +1291,7 @@ def run_release_branch(
     created_at = datetime.datetime.utcfromtimestamp(timestamp).isoformat()
     results = []
     for subapp_path in subapp_paths:
-        app_key = get_appKey(repo, subapp_path, repo_url)
+        app_key = get_git_index(repo).get_app_key(subapp_path, repo_url)
         is_published, err_msg = check_app_is_published(
             prod_server_address=prod_server_address,
             prod_api_token=prod_api_token,
@@ -606,11 +1337,18 @@ def run_release_branch(
                     created_at=created_at,
                     share=share,
                     archive_only_config=archive_only_config,
+                    archive_size_budget=archive_size_budget,
+                    skip_if_unchanged=skip_unchanged_upload,
                 )
             )
             if results[-1]["Status code"] == 200:
                 if not results[-1].get("Skipped"):
                     print("  [OK]\n")
+                    # the base of change detection of the next upload of this branch
+                    if changed_only:
+                        save_upload_ref(
+                            repo, subapp_path, release_version, repo.head.commit.hexsha
+                        )
             else:
                 print("[Fail]\n")
                 if len(subapp_paths) > 1:
@@ -646,6 +1384,7 @@ def run_release_branch(
                 }
             )
     all_success = print_results(results)
+    save_release_history(slug, ReleaseType.RELEASE_BRANCH, release_version, results)
     if all_success:
         return 0
     return 1
@@ -660,13 +1399,14 @@ def publish(
     subapp_paths: List[str],
     gh_releases: List[GitRelease.GitRelease],
     archive_only_config=False,
+    archive_size_budget=None,
 ):
     """
     Creates a release for every release in the repository.
     """
     all_success = True
     for subapp_path in subapp_paths:
-        app_key = get_appKey(repo, subapp_path, repo_url)
+        app_key = get_git_index(repo).get_app_key(subapp_path, repo_url)
 
         if subapp_path is None:
             print("Publishing root app...".ljust(53), end=" ")
@@ -709,6 +1449,7 @@ def publish(
             release_version = gh_release.tag_name
             if release_version.startswith("sly-release-"):
                 release_version = release_version[len("sly-release-") :]
+            start = time.monotonic()
             results.append(
                 do_release(
                     repo=repo,
@@ -723,8 +1464,12 @@ def publish(
                     created_at=None,
                     share=False,
                     archive_only_config=archive_only_config,
+                    archive_size_budget=archive_size_budget,
                 )
             )
+            results[-1]["Stats"].setdefault("durations", {})["total"] = (
+                time.monotonic() - start
+            )
             # if any of the releases is successful, consider the whole app release successful
             success = success or results[-1]["Status code"] == 200
         if success:
@@ -735,6 +1480,7 @@ def publish(
         # if all of the apps released successfully, consider the whole release successful
         all_success = all_success and success
         print_results(results)
+        save_release_history(slug, ReleaseType.PUBLISH, "All", results)
     return 0 if all_success else 1
 
 
@@ -1064,7 +1810,13 @@ def run(
     release_type: Literal["release", "release-branch", "publish"],
     include_sly_releases=False,
     archive_only_config=False,
+    archive_size_budget=None,
     sdk_github_access_token=None,
+    skip_unchanged_upload=False,
+    changed_only=False,
+    force_full_release=False,
+    shared_paths=None,
+    root_only_paths=None,
 ):
     """
     slug - Slug of the app. Example: "supervisely-ecosystem/test-app"
@@ -1082,6 +1834,14 @@ def run(
                       Example: "v1.0.0" or "test-branch"
     release_description - Description of the release.
     release_type - Type of the release. One of "release", "release-branch", "publish"
+    skip_unchanged_upload - Skip branch release upload if the archive is identical to the last upload.
+    changed_only - Release only subapps changed since the previous release tag or branch upload.
+    force_full_release - Release all subapps even if changed_only is set.
+    shared_paths - Paths that affect every subapp when changed_only is set.
+    root_only_paths - Paths outside subapp directories that affect only the root app
+                      when changed_only is set.
+    archive_size_budget - Max size in bytes of the files in an app archive before compression.
+                          The release fails before compressing if it is exceeded.
     """
 
     release_types = [
@@ -1130,13 +1890,33 @@ def run(
         return 1
 
     repo = git.Repo()
+    repo_url = get_git_index(repo).get_repo_url(slug)
+
+    if changed_only and force_full_release:
+        print("INFO: Full release is forced. Change detection is skipped.")
+    elif changed_only:
+        subapp_paths = detect_changed_subapps(
+            repo,
+            subapp_paths,
+            release_type,
+            release_version,
+            shared_paths or [],
+            root_only_paths or [],
+        )
+        if len(subapp_paths) == 0:
+            print("INFO: No subapps changed. Nothing to release.")
+            return 0
+        print(
+            "INFO: Releasing changed subapps: "
+            f"{['__ROOT_APP__' if p is None else p for p in subapp_paths]}"
+        )
+        print()
+
     try:
-        remote_name = repo.active_branch.tracking_branch().remote_name
-        remote = repo.remote(remote_name)
-        repo_url = remote.url
-    except:
-        repo_url = f"https://github.com/{slug}"
-        print(f"Cannot define remote branch. Set repo_url to {repo_url}")
+        prepare_checkout(repo, subapp_paths, archive_only_config)
+    except Exception as e:
+        print(f"ERROR: Could not prepare partial checkout: {e}")
+        return 1
 
     try:
         validate_docker_image(subapp_paths)
@@ -1175,6 +1955,7 @@ def run(
             release_version=release_version,
             release_description=release_description,
             archive_only_config=archive_only_config,
+            archive_size_budget=archive_size_budget,
         )
 
     if release_type == ReleaseType.RELEASE_BRANCH:
@@ -1191,6 +1972,9 @@ def run(
             release_version=release_version,
             release_description=release_description,
             archive_only_config=archive_only_config,
+            archive_size_budget=archive_size_budget,
+            skip_unchanged_upload=skip_unchanged_upload,
+            changed_only=changed_only,
         )
 
     if release_type == ReleaseType.PUBLISH:
@@ -1210,6 +1994,7 @@ def run(
             subapp_paths=subapp_paths,
             gh_releases=gh_releases,
             archive_only_config=archive_only_config,
+            archive_size_budget=archive_size_budget,
         )
 
     return 1
@@ -1254,6 +2039,25 @@ def main():
     release_description = os.getenv("RELEASE_DESCRIPTION", None)
     archive_only_config = os.getenv("ARCHIVE_ONLY_CONFIG", False)
     archive_only_config = archive_only_config in [1, "1", "true", "True", True]
+    # in MB, 0 or empty disables the check
+    archive_size_budget = os.getenv("ARCHIVE_SIZE_BUDGET", "") or 0
+    archive_size_budget = int(float(archive_size_budget) * 1024 * 1024) or None
+    skip_unchanged_upload = os.getenv("SKIP_UNCHANGED_UPLOAD", False)
+    skip_unchanged_upload = skip_unchanged_upload in [1, "1", "true", "True", True]
+    changed_only = os.getenv("RELEASE_CHANGED_ONLY", False)
+    changed_only = changed_only in [1, "1", "true", "True", True]
+    force_full_release = os.getenv("FORCE_FULL_RELEASE", False)
+    force_full_release = force_full_release in [1, "1", "true", "True", True]
+    shared_paths = [
+        p.strip(" ").strip("/")
+        for p in os.getenv("SHARED_PATHS", "").split(",")
+        if p.strip(" ").strip("/")
+    ]
+    root_only_paths = [
+        p.strip(" ").strip("/")
+        for p in os.getenv("ROOT_ONLY_PATHS", "").split(",")
+        if p.strip(" ").strip("/")
+    ]
 
     def _token_info(token):
         # Provide a safe preview and a short hash for debugging without exposing full secret
@@ -1327,7 +2131,13 @@ def main():
             release_description=release_description,
             release_type=release_type,
             archive_only_config=archive_only_config,
+            archive_size_budget=archive_size_budget,
             sdk_github_access_token=sdk_github_access_token,
+            skip_unchanged_upload=skip_unchanged_upload,
+            changed_only=changed_only,
+            force_full_release=force_full_release,
+            shared_paths=shared_paths,
+            root_only_paths=root_only_paths,
         )
     )
 
@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+
+def get_state_dir() -> Path:
+    """Runner-local directory of release and model sync state, $RELEASE_STATE_DIR."""
+    state_dir = os.getenv("RELEASE_STATE_DIR", None)
+    if not state_dir:
+        state_dir = "~/.supervisely-release"
+    return Path(state_dir).expanduser()
+
+
+def get_history_path() -> Path:
+    return get_state_dir().joinpath("release_history.jsonl")
+
+
+def make_app_record(result: Dict) -> Dict:
+    stats = result.get("Stats", {})
+    app_path = result.get("App path")
+    return {
+        "app_path": "__ROOT_APP__" if app_path is None else app_path,
+        "app_name": result.get("App name"),
+        "release": result.get("Release"),
+        "status": result.get("Status code"),
+        "skipped": bool(result.get("Skipped", False)),
+        "attempts": result.get("Attempts", 1),
+        "durations": stats.get("durations", {}),
+        "archive_size": stats.get("archive_size"),
+    }
+
+
+def append_run(path: Path, repo: str, release_type: str, release_version: str, results):
+    record = {
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "repo": repo,
+        "release_type": release_type,
+        "release_version": release_version,
+        "apps": [make_app_record(r) for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # a single short append keeps lines intact when jobs share a runner
+    with open(path, "a") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return record
+
+
+def read_runs(path: Path) -> List[Dict]:
+    runs = []
+    if not path.exists():
+        return runs
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                runs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return runs
+
+
+def percentile(values: List[float], q: float):
+    """Nearest-rank percentile, None for an empty list."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+def format_seconds(value) -> str:
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def format_size(value) -> str:
+    if value is None:
+        return "-"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+
+
+def jumped(previous, current, ratio: float) -> bool:
+    if previous is None or current is None or previous <= 0:
+        return False
+    return current / previous >= ratio
+
+
+def collect_app_series(runs: List[Dict]) -> Dict:
+    """Groups uploaded app records by (repo, app_path), oldest first."""
+    series = {}
+    for run in runs:
+        for app in run.get("apps", []):
+            if app.get("status") != 200 or app.get("skipped"):
+                continue
+            key = (run.get("repo"), app.get("app_path"))
+            series.setdefault(key, []).append(
+                {**app, "release_version": run.get("release_version")}
+            )
+    return series
+
+
+def report(runs: List[Dict], size_jump: float, time_jump: float) -> List[str]:
+    """Prints p50/p95 trends per repo and subapp. Returns the list of flagged apps."""
+    by_repo = {}
+    for run in runs:
+        by_repo.setdefault(run.get("repo"), []).append(run)
+
+    print(
+        f'{"Repo".ljust(40)}{"Runs".ljust(8)}{"Failed".ljust(8)}{"p50 total".ljust(12)}p95 total'
+    )
+    for repo, repo_runs in sorted(by_repo.items(), key=lambda x: str(x[0])):
+        totals = [
+            sum(app.get("durations", {}).get("total", 0) for app in run.get("apps", []))
+            for run in repo_runs
+        ]
+        failed = sum(
+            1
+            for run in repo_runs
+            if any(app.get("status") != 200 for app in run.get("apps", []))
+        )
+        print(
+            f"{str(repo).ljust(38)[:38]}  "
+            + str(len(repo_runs)).ljust(8)
+            + str(failed).ljust(8)
+            + format_seconds(percentile(totals, 50)).ljust(12)
+            + format_seconds(percentile(totals, 95))
+        )
+    print()
+
+    flagged = []
+    print(
+        f'{"Repo".ljust(30)}{"App path".ljust(20)}{"p50 upload".ljust(12)}{"p95 upload".ljust(12)}'
+        f'{"p50 archive".ljust(13)}{"Last size".ljust(12)}Flags'
+    )
+    for (repo, app_path), apps in sorted(
+        collect_app_series(runs).items(), key=lambda x: str(x[0])
+    ):
+        uploads = [
+            a["durations"]["upload"] for a in apps if "upload" in a.get("durations", {})
+        ]
+        archives = [
+            a["durations"]["archive"]
+            for a in apps
+            if "archive" in a.get("durations", {})
+        ]
+        last = apps[-1]
+        flags = []
+        if len(apps) > 1:
+            prev = apps[-2]
+            if jumped(prev.get("archive_size"), last.get("archive_size"), size_jump):
+                flags.append(
+                    f'size {format_size(prev["archive_size"])} -> {format_size(last["archive_size"])}'
+                )
+            if jumped(
+                prev.get("durations", {}).get("upload"),
+                last.get("durations", {}).get("upload"),
+                time_jump,
+            ):
+                flags.append(
+                    f'upload {format_seconds(prev["durations"]["upload"])} -> {format_seconds(last["durations"]["upload"])}'
+                )
+        if flags:
+            flagged.append(
+                f"{repo}:{app_path} ({last['release_version']}): {', '.join(flags)}"
+            )
+        print(
+            f"{str(repo).ljust(28)[:28]}  "
+            + f"{str(app_path).ljust(18)[:18]}  "
+            + format_seconds(percentile(uploads, 50)).ljust(12)
+            + format_seconds(percentile(uploads, 95)).ljust(12)
+            + format_seconds(percentile(archives, 50)).ljust(13)
+            + format_size(last.get("archive_size")).ljust(12)
+            + ("; ".join(flags) if flags else "")
+        )
+    print()
+    return flagged
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Release performance history.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser(
+        "report", help="Show p50/p95 trends and flag jumps since the previous release"
+    )
+    report_parser.add_argument(
+        "--history",
+        default=None,
+        help="Path to the history file (default: $RELEASE_STATE_DIR/release_history.jsonl)",
+    )
+    report_parser.add_argument(
+        "--repo", default=None, help="Only show runs of this repo slug"
+    )
+    report_parser.add_argument(
+        "--last", type=int, default=None, help="Only use the last N runs of each repo"
+    )
+    report_parser.add_argument(
+        "--size-jump",
+        type=float,
+        default=1.5,
+        help="Flag apps whose archive size grew by this factor since the previous release",
+    )
+    report_parser.add_argument(
+        "--time-jump",
+        type=float,
+        default=2.0,
+        help="Flag apps whose upload time grew by this factor since the previous release",
+    )
+    report_parser.add_argument(
+        "--fail-on-flags",
+        action="store_true",
+        help="Exit with code 1 if any app is flagged",
+    )
+    args = parser.parse_args()
+
+    path = Path(args.history) if args.history else get_history_path()
+    runs = read_runs(path)
+    if args.repo is not None:
+        runs = [r for r in runs if r.get("repo") == args.repo]
+    if args.last is not None:
+        limited = []
+        for repo in {r.get("repo") for r in runs}:
+            limited.extend([r for r in runs if r.get("repo") == repo][-args.last :])
+        runs = sorted(limited, key=lambda r: r.get("timestamp", ""))
+    if not runs:
+        print(f"No release history found in {path}")
+        return 0
+
+    flagged = report(runs, args.size_jump, args.time_jump)
+    if flagged:
+        print("Jumps since the previous release:")
+        for line in flagged:
+            print(f"  {line}")
+        if args.fail_on_flags:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from get_image_packages import extract_pypi_packages
+
+PURL_TYPES = ["pypi", "deb", "npm", "generic"]
+
+
+def make_artifact(idx: int, files_per_artifact: int) -> dict:
+    purl_type = PURL_TYPES[idx % len(PURL_TYPES)]
+    name = f"package-{idx}"
+    version = f"{idx % 7}.{idx % 13}.{idx % 5}"
+    return {
+        "id": f"{idx:016x}",
+        "name": name,
+        "version": version,
+        "type": "python" if purl_type == "pypi" else purl_type,
+        "foundBy": "python-installed-package-cataloger",
+        "locations": [{"path": f"/usr/lib/python3/dist-packages/{name}/RECORD"}],
+        "licenses": [{"value": "MIT", "spdxExpression": "MIT", "type": "declared"}],
+        "language": "python",
+        "cpes": [
+            {
+                "cpe": f"cpe:2.3:a:{name}:{name}:{version}:*:*:*:*:*:*:*",
+                "source": "syft",
+            }
+        ],
+        "purl": f"pkg:{purl_type}/{name}@{version}",
+        "metadataType": "python-package",
+        "metadata": {
+            "name": name,
+            "version": version,
+            "files": [
+                {
+                    "path": f"{name}/module_{i}.py",
+                    "digest": {
+                        "algorithm": "sha256",
+                        "value": "%064x" % random.getrandbits(256),
+                    },
+                    "size": str(random.randint(100, 100000)),
+                }
+                for i in range(files_per_artifact)
+            ],
+        },
+    }
+
+
+def generate_sbom(path: Path, artifacts: int, files_per_artifact: int):
+    """Writes a Syft-like report artifact by artifact, so generation itself stays small."""
+    with open(path, "w") as f:
+        f.write('{"artifacts":[\n')
+        for idx in range(artifacts):
+            if idx:
+                f.write(",\n")
+            json.dump(make_artifact(idx, files_per_artifact), f, indent=1)
+        f.write('\n],"artifactRelationships":[],"source":{"type":"image"},')
+        f.write('"distro":{"name":"ubuntu"},"schema":{"version":"16.0.0"}}\n')
+
+
+def parse_full(syft_path: Path) -> dict:
+    """Previous implementation: the whole report is loaded into memory."""
+    data = json.loads(syft_path.read_text())
+    packages = {}
+    for artifact in data.get("artifacts", []):
+        name, version = artifact.get("name"), artifact.get("version")
+        if name and version and artifact.get("purl", "").startswith("pkg:pypi/"):
+            packages[name.lower()] = version
+    return packages
+
+
+def run_parser(parser_name: str, syft_path: Path):
+    """Runs in a child process, so peak RSS belongs to one parser only."""
+    start = time.perf_counter()
+    if parser_name == "full":
+        packages = parse_full(syft_path)
+    else:
+        packages = extract_pypi_packages(syft_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps(
+            {"packages": len(packages), "seconds": elapsed, "peak_rss_mb": peak_mb}
+        )
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare full and streaming Syft JSON parsing on a generated report"
+    )
+    parser.add_argument(
+        "--artifacts", type=int, default=100000, help="Number of artifacts"
+    )
+    parser.add_argument(
+        "--files-per-artifact",
+        type=int,
+        default=20,
+        help="Files listed in each artifact",
+    )
+    parser.add_argument(
+        "--syft-json", default=None, help="Use this report instead of generating one"
+    )
+    parser.add_argument("--run", choices=["full", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_parser(args.run, Path(args.syft_json))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        syft_path = (
+            Path(args.syft_json) if args.syft_json else Path(tmp_dir, "sbom.json")
+        )
+        if not args.syft_json:
+            print(f"Generating {args.artifacts} artifacts...")
+            generate_sbom(syft_path, args.artifacts, args.files_per_artifact)
+        size_mb = syft_path.stat().st_size / 1024 / 1024
+        print(f"Report size: {size_mb:.1f} MB")
+        print(f'{"Parser".ljust(10)}{"Packages".ljust(10)}{"Time".ljust(10)}Peak RSS')
+        results = {}
+        for parser_name in ["full", "stream"]:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--run",
+                    parser_name,
+                    "--syft-json",
+                    str(syft_path),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[parser_name] = json.loads(output.strip().splitlines()[-1])
+            r = results[parser_name]
+            print(
+                parser_name.ljust(10)
+                + str(r["packages"]).ljust(10)
+                + f'{r["seconds"]:.2f}s'.ljust(10)
+                + f'{r["peak_rss_mb"]:.0f} MB'
+            )
+        if results["full"]["packages"] != results["stream"]["packages"]:
+            print("ERROR: parsers found different packages")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict
+
+from get_image_packages import extract_pypi_packages
+
+try:
+    from packaging.version import InvalidVersion, Version
+except ImportError:
+    Version = None
+
+
+def normalize_name(name: str) -> str:
+    """PEP 503 normalized package name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def read_requirements(path: Path) -> Dict[str, str]:
+    """Pinned name==version lines, as written by get_image_packages.py."""
+    packages = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line or "==" not in line:
+                continue
+            name, version = line.split("==", 1)
+            packages[normalize_name(name.split("[", 1)[0].strip())] = version.strip()
+    return packages
+
+
+def read_packages(path: Path) -> Dict[str, str]:
+    """Packages from an index JSON written by this script or a requirements-style list."""
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+    if head == "{":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["packages"]
+    return read_requirements(path)
+
+
+def get_packages_digest(packages: Dict[str, str]) -> str:
+    """Stable digest of a package set, independent of name spelling and order."""
+    lines = sorted(
+        f"{normalize_name(name)}=={version}" for name, version in packages.items()
+    )
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def compare_versions(old: str, new: str) -> str:
+    if Version is not None:
+        try:
+            return "upgraded" if Version(new) > Version(old) else "downgraded"
+        except InvalidVersion:
+            pass
+    return "changed"
+
+
+def diff_packages(old: Dict[str, str], new: Dict[str, str]) -> Dict:
+    diff = {"added": {}, "removed": {}, "upgraded": {}, "downgraded": {}, "changed": {}}
+    for name in sorted(set(old) | set(new)):
+        if name not in old:
+            diff["added"][name] = new[name]
+        elif name not in new:
+            diff["removed"][name] = old[name]
+        elif old[name] != new[name]:
+            diff[compare_versions(old[name], new[name])][name] = [old[name], new[name]]
+    return diff
+
+
+def set_output(name: str, value: str):
+    output_path = os.getenv("GITHUB_OUTPUT")
+    if output_path:
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(f"{name}={value}\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Index an image package set and diff it with the previous published one"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--syft-json", help="Syft JSON report of the new image")
+    source.add_argument(
+        "--packages", help="Requirements-style package list of the new image"
+    )
+    parser.add_argument(
+        "--previous",
+        default=None,
+        help="Index JSON or package list of the previous image, a missing file means no previous image",
+    )
+    parser.add_argument(
+        "--output-index", default=None, help="Path to write the new index JSON"
+    )
+    parser.add_argument(
+        "--output-diff", default=None, help="Path to write the diff JSON"
+    )
+    args = parser.parse_args()
+
+    if args.syft_json:
+        packages = extract_pypi_packages(Path(args.syft_json))
+    else:
+        packages = read_packages(Path(args.packages))
+    packages = {normalize_name(name): version for name, version in packages.items()}
+    digest = get_packages_digest(packages)
+    print(f"Package set: {len(packages)} packages, digest {digest}")
+
+    if args.output_index:
+        index = {"digest": digest, "packages": dict(sorted(packages.items()))}
+        Path(args.output_index).write_text(json.dumps(index, indent=2) + "\n")
+
+    previous_path = Path(args.previous) if args.previous else None
+    if previous_path is None or not previous_path.exists():
+        print("No previous package set, treating as changed")
+        changed = True
+        diff = diff_packages({}, packages)
+    else:
+        previous = read_packages(previous_path)
+        changed = get_packages_digest(previous) != digest
+        diff = diff_packages(previous, packages)
+        if not changed:
+            print("Package set is identical to the previous one")
+        for kind in ["added", "removed", "upgraded", "downgraded", "changed"]:
+            for name, version in diff[kind].items():
+                if isinstance(version, list):
+                    version = " -> ".join(version)
+                print(f"  {kind.ljust(10)} {name} {version}")
+
+    if args.output_diff:
+        Path(args.output_diff).write_text(
+            json.dumps({"digest": digest, "changed": changed, **diff}, indent=2) + "\n"
+        )
+    set_output("packages_digest", digest)
+    set_output("packages_changed", "true" if changed else "false")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,124 @@
 import argparse
 import json
 from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class JsonStream:
+    """Incremental reader over a JSON text file that decodes one value at a time."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop the consumed part so the buffer never grows past one value plus a chunk
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, empty string at the end."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON, found {found!r}")
+        self.pos += 1
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            # a number may continue in the next chunk
+            if end == len(self.buf) and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_report(
+    syft_path: Path, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, object]]:
+    """
+    Yields (key, value) for top-level keys of a Syft JSON report. Arrays (artifacts,
+    artifactRelationships, files) are yielded item by item, so memory use is bounded by
+    the largest item, not the report size.
+    """
+    with open(syft_path, "r", encoding="utf-8") as f:
+        stream = JsonStream(f, chunk_size)
+        stream.expect("{")
+        while True:
+            char = stream.peek()
+            if char == "}":
+                return
+            if char == ",":
+                stream.pos += 1
+                continue
+            key = stream.decode()
+            stream.expect(":")
+            if stream.peek() != "[":
+                yield key, stream.decode()
+                continue
+            stream.expect("[")
+            while True:
+                char = stream.peek()
+                if char == "]":
+                    stream.pos += 1
+                    break
+                if char == ",":
+                    stream.pos += 1
+                    continue
+                yield key, stream.decode()
+
+
+def iter_artifacts(syft_path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """Artifacts of a Syft JSON report one by one. Syft writes them first, the rest is not read."""
+    seen = False
+    for key, artifact in iter_report(syft_path, chunk_size):
+        if key == "artifacts":
+            seen = True
+            yield artifact
+        elif seen:
+            return
+
+
+def extract_pypi_packages(syft_path: Path) -> Dict[str, str]:
+    """Lowercased name -> version of pkg:pypi/ artifacts."""
+    packages = {}
+    for artifact in iter_artifacts(syft_path):
+        purl = artifact.get("purl", "")
+        name = artifact.get("name")
+        version = artifact.get("version")
+        if not name or not version:
+            continue
+        if purl.startswith("pkg:pypi/"):
+            packages[name.lower()] = version
+    return packages
 
 
 def main() -> int:
@@ -22,18 +140,7 @@ def main() -> int:
     syft_path = Path(args.syft_json)
     output_path = Path(args.output_requirements)
 
-    data = json.loads(syft_path.read_text())
-    artifacts = data.get("artifacts", [])
-
-    packages = {}
-    for artifact in artifacts:
-        purl = artifact.get("purl", "")
-        name = artifact.get("name")
-        version = artifact.get("version")
-        if not name or not version:
-            continue
-        if purl.startswith("pkg:pypi/"):
-            packages[name.lower()] = version
+    packages = extract_pypi_packages(syft_path)
 
     lines = [f"{name}=={packages[name]}" for name in sorted(packages)]
     output_path.write_text("\n".join(lines) + ("\n" if lines else ""))
@@ -43,4 +150,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
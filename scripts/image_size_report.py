@@ -0,0 +1,307 @@
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from diff_image_packages import normalize_name
+from get_image_packages import iter_report
+
+DEB_DEPENDS_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9+._-]*)")
+REQUIRES_DIST_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def format_size(value) -> str:
+    if value is None:
+        return "-"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+
+
+def get_installed_size(artifact: Dict) -> Optional[int]:
+    """Installed bytes from the package metadata, None if Syft does not record it."""
+    metadata = artifact.get("metadata") or {}
+    files = metadata.get("files")
+    if artifact.get("type") == "python" and isinstance(files, list):
+        sizes = [f.get("size") for f in files if isinstance(f, dict)]
+        return sum(int(s) for s in sizes if s not in [None, ""] and str(s).isdigit())
+    if artifact.get("type") == "deb" and metadata.get("installedSize") is not None:
+        # dpkg records kilobytes
+        return int(metadata["installedSize"]) * 1024
+    if artifact.get("type") == "apk" and metadata.get("installedSize") is not None:
+        return int(metadata["installedSize"])
+    if artifact.get("type") == "rpm" and metadata.get("size") is not None:
+        return int(metadata["size"])
+    return None
+
+
+def get_dependencies(artifact: Dict) -> Set[str]:
+    """Names of declared runtime dependencies (pip Requires-Dist, dpkg Depends/Pre-Depends)."""
+    metadata = artifact.get("metadata") or {}
+    names = set()
+    if artifact.get("type") == "python":
+        for requirement in metadata.get("requiresDist") or []:
+            # optional extras are not installed unless asked for
+            if "extra ==" in requirement.replace('"', "").replace("'", ""):
+                continue
+            match = REQUIRES_DIST_RE.match(requirement)
+            if match:
+                names.add(normalize_name(match.group(1)))
+    elif artifact.get("type") == "deb":
+        for field in ["depends", "preDepends"]:
+            for depends in metadata.get(field) or []:
+                for alternative in depends.split("|"):
+                    match = DEB_DEPENDS_RE.match(alternative)
+                    if match:
+                        names.add(match.group(1).split(":")[0].lower())
+    return names
+
+
+def get_layer(artifact: Dict) -> Optional[str]:
+    for location in artifact.get("locations") or []:
+        if location.get("layerID"):
+            return location["layerID"]
+    return None
+
+
+def load_report(syft_path: Path):
+    """Packages with size, layer and dependencies, and the image layers."""
+    packages = []
+    layers = []
+    for key, value in iter_report(syft_path):
+        if key == "artifacts":
+            name = value.get("name")
+            if not name:
+                continue
+            kind = value.get("type", "")
+            packages.append(
+                {
+                    "name": normalize_name(name) if kind == "python" else name.lower(),
+                    "version": value.get("version"),
+                    "type": kind,
+                    "size": get_installed_size(value),
+                    "layer": get_layer(value),
+                    "dependencies": get_dependencies(value),
+                }
+            )
+        elif key == "source":
+            metadata = value.get("metadata") or {}
+            layers = [
+                {"digest": l.get("digest"), "size": l.get("size")}
+                for l in metadata.get("layers") or []
+            ]
+    return packages, layers
+
+
+def group_by_top_level(
+    packages: List[Dict], roots: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Size of every top-level package with its dependency closure, per package type.
+    "exclusive" counts dependencies no other top-level package needs, i.e. what removing
+    the top-level package would save. Top-level packages are the given roots or the
+    packages no other package depends on.
+    """
+    groups = []
+    for kind in sorted({p["type"] for p in packages}):
+        by_name = {}
+        for package in packages:
+            if package["type"] == kind:
+                by_name.setdefault(package["name"], []).append(package)
+        depended_on = set()
+        for items in by_name.values():
+            for package in items:
+                depended_on |= package["dependencies"]
+        if roots is not None and kind == "python":
+            kind_roots = [
+                normalize_name(r) for r in roots if normalize_name(r) in by_name
+            ]
+        else:
+            kind_roots = [name for name in by_name if name not in depended_on]
+
+        closures = {}
+        for root in kind_roots:
+            seen = set()
+            stack = [root]
+            while stack:
+                name = stack.pop()
+                if name in seen or name not in by_name:
+                    continue
+                seen.add(name)
+                for package in by_name[name]:
+                    stack.extend(package["dependencies"])
+            closures[root] = seen
+        owners = {}
+        for root, closure in closures.items():
+            for name in closure:
+                owners[name] = owners.get(name, 0) + 1
+
+        def closure_size(names):
+            return sum(p["size"] or 0 for name in names for p in by_name[name])
+
+        for root, closure in closures.items():
+            groups.append(
+                {
+                    "type": kind,
+                    "name": root,
+                    "packages": len(closure),
+                    "size": closure_size(closure),
+                    "exclusive": closure_size([n for n in closure if owners[n] == 1]),
+                }
+            )
+    return sorted(groups, key=lambda g: g["size"], reverse=True)
+
+
+def find_duplicates(packages: List[Dict], base_layers: Set[str]) -> List[Dict]:
+    """Packages installed more than once, e.g. in the base image and again in the app layer."""
+    by_name = {}
+    for package in packages:
+        by_name.setdefault((package["type"], package["name"]), []).append(package)
+    duplicates = []
+    for (kind, name), items in sorted(by_name.items()):
+        layers = {p["layer"] for p in items}
+        if len(items) < 2 or len(layers) < 2:
+            continue
+        in_base = [p for p in items if p["layer"] in base_layers]
+        in_app = [p for p in items if p["layer"] not in base_layers]
+        if base_layers and not (in_base and in_app):
+            continue
+        duplicates.append(
+            {
+                "type": kind,
+                "name": name,
+                "versions": sorted({str(p["version"]) for p in items}),
+                # the copy in the lower layer is shadowed but still pulled
+                "shadowed": sum(
+                    p["size"] or 0 for p in (in_base if base_layers else items[:-1])
+                ),
+            }
+        )
+    return sorted(duplicates, key=lambda d: d["shadowed"], reverse=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Attribute image size to packages and top-level dependencies from a Syft JSON report"
+    )
+    parser.add_argument(
+        "--syft-json", required=True, help="Syft JSON report of the app image"
+    )
+    parser.add_argument(
+        "--base-syft-json",
+        default=None,
+        help="Syft JSON report of the base image, its layers are marked as base",
+    )
+    parser.add_argument(
+        "--base-layers",
+        type=int,
+        default=None,
+        help="Number of bottom layers that belong to the base image",
+    )
+    parser.add_argument(
+        "--requirements",
+        default=None,
+        help="App requirements, used as top-level Python packages instead of graph roots",
+    )
+    parser.add_argument(
+        "--top", type=int, default=20, help="Number of rows in each table"
+    )
+    parser.add_argument(
+        "--output-json", default=None, help="Path to write the full report"
+    )
+    args = parser.parse_args()
+
+    packages, layers = load_report(Path(args.syft_json))
+    base_layers = set()
+    if args.base_syft_json:
+        _, base_image_layers = load_report(Path(args.base_syft_json))
+        base_layers = {l["digest"] for l in base_image_layers}
+    elif args.base_layers is not None:
+        base_layers = {l["digest"] for l in layers[: args.base_layers]}
+
+    roots = None
+    if args.requirements:
+        roots = []
+        with open(args.requirements, "r", encoding="utf-8") as f:
+            for line in f:
+                match = REQUIRES_DIST_RE.match(line.split("#", 1)[0])
+                if match and not line.lstrip().startswith("-"):
+                    roots.append(match.group(1))
+
+    image_size = sum(l["size"] or 0 for l in layers)
+    attributed = sum(p["size"] or 0 for p in packages)
+    app_size = sum(l["size"] or 0 for l in layers if l["digest"] not in base_layers)
+    print(f"Image layers: {len(layers)}, compressed size {format_size(image_size)}")
+    if base_layers:
+        print(f"App layers: {format_size(app_size)}")
+    print(
+        f"Installed size attributed to {len(packages)} packages: {format_size(attributed)}"
+    )
+    print()
+
+    def layer_label(layer):
+        if layer is None:
+            return "-"
+        if base_layers:
+            return "base" if layer in base_layers else "app"
+        return layer.split(":")[-1][:12]
+
+    print(
+        f'{"Package".ljust(36)}{"Version".ljust(20)}{"Type".ljust(8)}{"Layer".ljust(14)}Size'
+    )
+    largest = sorted(packages, key=lambda p: p["size"] or 0, reverse=True)[: args.top]
+    for p in largest:
+        print(
+            p["name"][:35].ljust(36)
+            + str(p["version"])[:19].ljust(20)
+            + p["type"][:7].ljust(8)
+            + layer_label(p["layer"]).ljust(14)
+            + format_size(p["size"])
+        )
+    print()
+
+    groups = group_by_top_level(packages, roots)
+    print(
+        f'{"Top-level".ljust(36)}{"Type".ljust(8)}{"Packages".ljust(10)}{"With deps".ljust(12)}Exclusive'
+    )
+    for g in groups[: args.top]:
+        print(
+            g["name"][:35].ljust(36)
+            + g["type"][:7].ljust(8)
+            + str(g["packages"]).ljust(10)
+            + format_size(g["size"]).ljust(12)
+            + format_size(g["exclusive"])
+        )
+    print()
+
+    duplicates = find_duplicates(packages, base_layers)
+    if duplicates:
+        print("Packages installed more than once:")
+        for d in duplicates[: args.top]:
+            print(
+                f'  {d["type"]}/{d["name"]} {", ".join(d["versions"])}: '
+                f'{format_size(d["shadowed"])} shadowed'
+            )
+    else:
+        print("No packages installed more than once")
+
+    if args.output_json:
+        report = {
+            "image_size": image_size,
+            "app_size": app_size if base_layers else None,
+            "attributed": attributed,
+            "packages": [
+                {**p, "dependencies": sorted(p["dependencies"])}
+                for p in sorted(packages, key=lambda p: p["size"] or 0, reverse=True)
+            ],
+            "top_level": groups,
+            "duplicates": duplicates,
+        }
+        Path(args.output_json).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
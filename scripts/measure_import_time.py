@@ -0,0 +1,102 @@
+import argparse
+import shlex
+import statistics
+import subprocess
+import time
+from typing import Dict, List
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every top-level module."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        parts = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # nested imports are indented, top-level ones have a single leading space
+        if name.startswith("  "):
+            continue
+        cumulative[name.strip()] = int(parts[1])
+    return cumulative
+
+
+def measure(command: List[str], python: str, modules: List[str]) -> Dict:
+    code = "import " + ", ".join(modules)
+    start = time.perf_counter()
+    result = subprocess.run(
+        command + [python, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Import failed with {' '.join(command) or python}:\n{result.stderr[-2000:]}"
+        )
+    cumulative = parse_importtime(result.stderr)
+    return {"wall": wall, "modules": {m: cumulative.get(m, 0) / 1e6 for m in modules}}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare app import latency between interpreters or images, "
+        "e.g. built with and without PRECOMPILE_BYTECODE"
+    )
+    parser.add_argument(
+        "--modules",
+        default="supervisely",
+        help="Comma-separated modules the app imports on start",
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        help='label=command prefix, e.g. precompiled="docker run --rm --read-only IMAGE". '
+        "Repeat to compare, the first one is the baseline (default: this machine)",
+    )
+    parser.add_argument(
+        "--python", default="python", help="Python executable in the targets"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts per target")
+    args = parser.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    targets = []
+    for target in args.target or ["local="]:
+        label, _, command = target.partition("=")
+        targets.append((label, shlex.split(command)))
+
+    results = {}
+    for label, command in targets:
+        runs = [measure(command, args.python, modules) for _ in range(args.repeat)]
+        results[label] = {
+            "wall": statistics.median(r["wall"] for r in runs),
+            "modules": {
+                m: statistics.median(r["modules"][m] for r in runs) for m in modules
+            },
+        }
+
+    baseline = results[targets[0][0]]["wall"]
+    print(
+        f'{"Target".ljust(16)}{"Wall p50".ljust(11)}{"Speedup".ljust(9)}'
+        + "".join(m[:14].ljust(16) for m in modules)
+    )
+    for label, _ in targets:
+        r = results[label]
+        print(
+            label[:15].ljust(16)
+            + f'{r["wall"]:.3f}s'.ljust(11)
+            + f"{baseline / r['wall']:.2f}x".ljust(9)
+            + "".join(f"{r['modules'][m]:.3f}s".ljust(16) for m in modules)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
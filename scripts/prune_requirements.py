@@ -0,0 +1,219 @@
+import argparse
+import platform
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from diff_image_packages import normalize_name, read_packages
+from get_image_packages import iter_artifacts
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+except ImportError:
+    Requirement = None
+
+PINNED_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*==\s*([^\s;,]+)\s*(;.*)?$")
+INCLUDE_RE = re.compile(r"^(?:-r|--requirement)(?:\s*=\s*|\s*)(\S+)$")
+CONSTRAINT_RE = re.compile(r"^(?:-c|--constraint)(?:\s*=\s*|\s*)(\S+)$")
+# app requirements are installed into this venv, packages elsewhere are not importable by the app
+VENV_SITE_PACKAGES_RE = re.compile(r"^/opt/venv/lib/python[^/]*/site-packages/")
+
+
+def extract_venv_packages(syft_path: Path) -> Dict[str, str]:
+    """Lowercased name -> version of pkg:pypi/ artifacts found in the /opt/venv site-packages."""
+    packages = {}
+    for artifact in iter_artifacts(syft_path):
+        name = artifact.get("name")
+        version = artifact.get("version")
+        if (
+            not name
+            or not version
+            or not artifact.get("purl", "").startswith("pkg:pypi/")
+        ):
+            continue
+        locations = [loc.get("path", "") for loc in artifact.get("locations") or []]
+        if any(VENV_SITE_PACKAGES_RE.match(path) for path in locations):
+            packages[name.lower()] = version
+    return packages
+
+
+def get_python_version(syft_path: Path) -> Optional[str]:
+    """Version of the python interpreter Syft found in the image."""
+    for artifact in iter_artifacts(syft_path):
+        if artifact.get("type") == "binary" and artifact.get("name") == "python":
+            return artifact.get("version")
+    return None
+
+
+def get_marker_environment(python_version: str) -> Dict[str, str]:
+    """PEP 508 marker values of a Linux CPython image with the given Python version."""
+    parts = python_version.split(".")
+    return {
+        "python_version": ".".join(parts[:2]),
+        "python_full_version": (
+            python_version if len(parts) > 2 else python_version + ".0"
+        ),
+        "implementation_name": "cpython",
+        "platform_python_implementation": "CPython",
+        "os_name": "posix",
+        "sys_platform": "linux",
+        "platform_system": "Linux",
+        "platform_machine": platform.machine(),
+    }
+
+
+def parse_requirement(
+    line: str, environment: Optional[Dict] = None
+) -> Optional[Tuple[str, object]]:
+    """
+    (normalized name, matcher) of a simple requirement line, None for lines that must be
+    kept as is: options, URLs, VCS and local paths, requirements with extras, and
+    requirements with environment markers that are false for the image or cannot be
+    evaluated (no packaging or unknown Python version of the image).
+    The matcher is a pinned version or a packaging specifier set.
+    """
+    if line.startswith("-") or "://" in line or "@" in line or "[" in line:
+        return None
+    if Requirement is not None:
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            return None
+        if requirement.url or requirement.extras:
+            return None
+        if requirement.marker is not None:
+            # pip skips requirements whose markers are false, nothing to prune
+            if environment is None or not requirement.marker.evaluate(environment):
+                return None
+        return normalize_name(requirement.name), requirement.specifier
+    match = PINNED_RE.match(line)
+    if match is None or match.group(3):
+        return None
+    return normalize_name(match.group(1)), match.group(2)
+
+
+def read_requirement_lines(path, seen=None) -> List[str]:
+    """
+    Lines of a requirements file with -r includes inlined, since the image build gets
+    only one requirements file. Constraints files (-c) cannot be inlined and raise
+    ValueError.
+    """
+    path = Path(path).resolve()
+    seen = set() if seen is None else seen
+    if path in seen:
+        return []
+    seen.add(path)
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        for raw_line in f:
+            line = raw_line.split(" #", 1)[0].strip()
+            include = INCLUDE_RE.match(line)
+            if include:
+                lines.append(f"# {line}\n")
+                lines.extend(
+                    read_requirement_lines(path.parent.joinpath(include.group(1)), seen)
+                )
+                continue
+            if CONSTRAINT_RE.match(line):
+                raise ValueError(
+                    f"{path}: constraints files are not supported, pin the versions in the "
+                    f"requirements instead: {line}"
+                )
+            lines.append(raw_line if raw_line.endswith("\n") else raw_line + "\n")
+    return lines
+
+
+def is_satisfied(matcher, installed_version: str) -> bool:
+    if isinstance(matcher, str):
+        return matcher == installed_version
+    if not str(matcher):
+        # bare name, any installed version is fine
+        return True
+    return matcher.contains(installed_version, prereleases=True)
+
+
+def prune_requirements(
+    lines, base_packages: Dict[str, str], environment: Optional[Dict] = None
+):
+    """
+    Returns kept lines and pruned (line, installed version) pairs. `environment` holds
+    the marker values of the image, requirements with markers are kept without it.
+    """
+    kept, pruned = [], []
+    for raw_line in lines:
+        line = raw_line.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            kept.append(raw_line.rstrip("\n"))
+            continue
+        parsed = parse_requirement(line, environment)
+        if parsed is not None:
+            name, matcher = parsed
+            installed_version = base_packages.get(name)
+            if installed_version is not None and is_satisfied(
+                matcher, installed_version
+            ):
+                pruned.append((line, installed_version))
+                continue
+        kept.append(raw_line.rstrip("\n"))
+    return kept, pruned
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Drop requirements that the base image already satisfies"
+    )
+    base = parser.add_mutually_exclusive_group(required=True)
+    base.add_argument("--base-syft-json", help="Syft JSON report of the base image")
+    base.add_argument(
+        "--base-packages",
+        help="Package list of the base image (get_image_packages.py output)",
+    )
+    parser.add_argument("--requirements", required=True, help="App requirements file")
+    parser.add_argument(
+        "--output", required=True, help="Path to write pruned requirements"
+    )
+    parser.add_argument(
+        "--python-version",
+        default=None,
+        help="Python version of the base image for environment markers "
+        "(default: the interpreter found in --base-syft-json)",
+    )
+    args = parser.parse_args()
+
+    python_version = args.python_version
+    if args.base_syft_json:
+        base_packages = extract_venv_packages(Path(args.base_syft_json))
+        if python_version is None:
+            python_version = get_python_version(Path(args.base_syft_json))
+    else:
+        base_packages = read_packages(Path(args.base_packages))
+    base_packages = {
+        normalize_name(name): version for name, version in base_packages.items()
+    }
+    environment = None
+    if python_version:
+        print(f"Evaluating environment markers for Python {python_version}")
+        environment = get_marker_environment(python_version)
+    else:
+        print(
+            "Python version of the base image is unknown, requirements with markers are kept"
+        )
+
+    try:
+        lines = read_requirement_lines(args.requirements)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    kept, pruned = prune_requirements(lines, base_packages, environment)
+    left = [l for l in kept if l.strip() and not l.lstrip().startswith("#")]
+    # an empty file makes the Dockerfile skip building wheels
+    Path(args.output).write_text("\n".join(kept).strip("\n") + "\n" if left else "")
+
+    for line, installed_version in pruned:
+        print(f"Already in base image: {line} (installed {installed_version})")
+    print(f"Pruned {len(pruned)} requirements, {len(left)} left in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,56 @@
 import argparse
+import http.client
 import json
+import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List
+
+DOCKER_HUB_HOST = "hub.docker.com"
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Resolve release tag for Docker image.")
-    parser.add_argument("--config", required=True, help="Path to config.json")
+    parser.add_argument("--config", default=None, help="Path to config.json")
     parser.add_argument("--input-release-tag", default="", help="Explicit release tag input")
     parser.add_argument(
         "--requirements",
         default="dev_requirements.txt",
         help="Requirements file path to use as fallback when config.json is missing or does not define docker_image",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--batch",
+        default=None,
+        help="JSON list of {path, config, requirements, release_tag, tag_ref_name, image} entries "
+        "to resolve in one run, with concurrent Docker Hub tag checks",
+    )
+    parser.add_argument(
+        "--output-matrix",
+        default=None,
+        help="Batch mode: path to write the JSON matrix of images that need building",
+    )
+    parser.add_argument(
+        "--output-items",
+        default=None,
+        help="Batch mode: path to write the JSON list of all resolved entries with "
+        "tag_version, tag_ref_name and exists or error",
+    )
+    parser.add_argument(
+        "--skip-tag-check",
+        action="store_true",
+        help="Batch mode: do not query Docker Hub",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Batch mode: concurrent tag checks"
+    )
+    args = parser.parse_args()
+    if args.batch is None and args.config is None:
+        parser.error("--config is required unless --batch is used")
+    return args
 
 
 def resolve_from_config(config_path: str) -> str:
@@ -34,8 +70,8 @@ def resolve_from_config(config_path: str) -> str:
     return ".".join(version_parts)
 
 
-def resolve_from_requirements(requirements_path: str) -> str:
-    candidate_paths = [Path(requirements_path), Path("requirements.txt")]
+def resolve_from_requirements(requirements_path: str, root: str = ".") -> str:
+    candidate_paths = [Path(root, requirements_path), Path(root, "requirements.txt")]
     seen_paths = set()
 
     for path in candidate_paths:
@@ -65,30 +101,172 @@ def resolve_from_requirements(requirements_path: str) -> str:
     )
 
 
-def main() -> int:
-    args = parse_args()
-    input_tag = (args.input_release_tag or "").strip()
-    if input_tag:
-        print(input_tag)
-        return 0
+class ResolveError(Exception):
+    pass
+
 
+def resolve_version(config_path: str, requirements_path: str, root: str = ".") -> str:
     try:
-        version = resolve_from_config(args.config)
+        return resolve_from_config(str(Path(root, config_path)))
     except FileNotFoundError:
         try:
-            version = resolve_from_requirements(args.requirements)
+            return resolve_from_requirements(requirements_path, root)
         except Exception:
-            print("config.json not found. Provide inputs.release_tag.", file=sys.stderr)
-            return 1
+            raise ResolveError("config.json not found. Provide inputs.release_tag.")
     except json.JSONDecodeError as exc:
-        print(f"config.json is invalid JSON: {exc}", file=sys.stderr)
-        return 1
+        raise ResolveError(f"config.json is invalid JSON: {exc}")
     except (KeyError, ValueError):
         try:
-            version = resolve_from_requirements(args.requirements)
+            return resolve_from_requirements(requirements_path, root)
         except Exception:
-            print("config.json missing .docker_image; provide inputs.release_tag", file=sys.stderr)
-            return 1
+            raise ResolveError(
+                "config.json missing .docker_image; provide inputs.release_tag"
+            )
+
+
+def get_image_name(entry: Dict) -> str:
+    """Same rules as the build workflow: lowercased, in the supervisely namespace."""
+    image = entry.get("image") or Path(entry.get("path", ".")).resolve().name
+    image = image.lower()
+    if not image.startswith("supervisely/"):
+        image = f"supervisely/{image}"
+    return image
+
+
+def resolve_entry(entry: Dict) -> Dict:
+    root = entry.get("path", ".")
+    config = entry.get("config", "config.json")
+    requirements = entry.get("requirements", "dev_requirements.txt")
+    input_tag = (entry.get("release_tag") or "").strip()
+    item = {"path": root, "image": get_image_name(entry)}
+    try:
+        resolved = resolve_version(config, requirements, root)
+    except ResolveError as exc:
+        if not input_tag:
+            return {**item, "error": str(exc)}
+        resolved = ""
+    item["tag_version"] = input_tag or resolved
+    item["tag_ref_name"] = entry.get("tag_ref_name") or resolved or item["tag_version"]
+    return item
+
+
+class TagChecker:
+    """Docker Hub tag lookups over one keep-alive HTTPS connection per thread."""
+
+    def __init__(self, retries: int = 3):
+        self.retries = retries
+        self._local = threading.local()
+
+    def _connection(self, reset=False) -> http.client.HTTPSConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or reset:
+            if connection is not None:
+                connection.close()
+            connection = http.client.HTTPSConnection(DOCKER_HUB_HOST, timeout=30)
+            self._local.connection = connection
+        return connection
+
+    def get_status(self, image: str, tag: str) -> int:
+        path = f"/v2/repositories/{image}/tags/{tag}"
+        for attempt in range(1, self.retries + 1):
+            try:
+                connection = self._connection(reset=attempt > 1)
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status == 429 and attempt < self.retries:
+                    time.sleep(int(response.getheader("Retry-After", "2") or 2))
+                    continue
+                return response.status
+            except (OSError, http.client.HTTPException):
+                if attempt == self.retries:
+                    raise
+
+    def check(self, item: Dict) -> Dict:
+        try:
+            status = self.get_status(item["image"], item["tag_version"])
+        except Exception as exc:
+            return {
+                **item,
+                "error": f"Unable to validate tag existence on Docker Hub: {exc}",
+            }
+        if status == 200:
+            return {**item, "exists": True}
+        if status == 404:
+            return {**item, "exists": False}
+        return {
+            **item,
+            "error": f"Unable to validate tag existence on Docker Hub (HTTP {status}).",
+        }
+
+
+def run_batch(args) -> int:
+    with open(args.batch, "r", encoding="utf-8") as file_handle:
+        entries: List[Dict] = json.load(file_handle)
+
+    items = [resolve_entry(entry) for entry in entries]
+    to_check = [idx for idx, item in enumerate(items) if "error" not in item]
+    if args.skip_tag_check:
+        for idx in to_check:
+            items[idx]["exists"] = False
+    elif to_check:
+        checker = TagChecker()
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(args.workers, len(to_check)))
+        ) as executor:
+            checked = executor.map(checker.check, [items[idx] for idx in to_check])
+            for idx, item in zip(to_check, checked):
+                items[idx] = item
+
+    print(f'{"Image".ljust(50)}{"Tag".ljust(16)}Status', file=sys.stderr)
+    for item in items:
+        if "error" in item:
+            status = f"ERROR: {item['error']}"
+        else:
+            status = "exists, skip" if item["exists"] else "build"
+        print(
+            f'{item["image"][:49].ljust(50)}{str(item.get("tag_version", "-"))[:15].ljust(16)}{status}',
+            file=sys.stderr,
+        )
+
+    matrix = {
+        "include": [
+            {k: item[k] for k in ["path", "image", "tag_version", "tag_ref_name"]}
+            for item in items
+            if "error" not in item and not item["exists"]
+        ]
+    }
+    matrix_json = json.dumps(matrix, separators=(",", ":"))
+    if args.output_matrix:
+        Path(args.output_matrix).write_text(json.dumps(matrix, indent=2) + "\n")
+    if args.output_items:
+        Path(args.output_items).write_text(json.dumps(items, indent=2) + "\n")
+    output_path = os.getenv("GITHUB_OUTPUT")
+    if output_path:
+        with open(output_path, "a", encoding="utf-8") as file_handle:
+            file_handle.write(f"matrix={matrix_json}\n")
+            file_handle.write(
+                f"has_builds={'true' if matrix['include'] else 'false'}\n"
+            )
+    print(matrix_json)
+    return 1 if any("error" in item for item in items) else 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.batch is not None:
+        return run_batch(args)
+
+    input_tag = (args.input_release_tag or "").strip()
+    if input_tag:
+        print(input_tag)
+        return 0
+
+    try:
+        version = resolve_version(args.config, args.requirements)
+    except ResolveError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
 
     print(version)
     return 0
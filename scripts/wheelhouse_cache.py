@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import os
+import platform
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from diff_image_packages import normalize_name
+
+try:
+    from packaging.utils import canonicalize_version
+except ImportError:
+    canonicalize_version = None
+
+REQUIREMENT_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$")
+PIN_RE = re.compile(r"^==\s*([^\s;,*]+)$")
+DOCKERFILE_PYTHON_RE = re.compile(
+    r"^FROM\s+python:(\d+\.\d+)", re.IGNORECASE | re.MULTILINE
+)
+RELEASE_RE = re.compile(r"^v?(\d+(?:\.\d+)*)(.*)$")
+
+
+def normalize_version(version: str) -> str:
+    """PEP 440 canonical version, so the pin 1.26 matches the wheel of 1.26.0."""
+    if canonicalize_version is not None:
+        return canonicalize_version(version)
+    # without packaging: lowercase and drop trailing zeros of the release segment
+    version = version.strip().lower()
+    match = RELEASE_RE.match(version)
+    if match is None:
+        return version
+    release = match.group(1)
+    while release.endswith(".0"):
+        release = release[:-2]
+    return release + match.group(2)
+
+
+def normalize_requirement(line: str) -> Optional[Dict]:
+    """
+    Normalized form of a requirement line, so formatting does not change the cache key.
+    Returns None for comments, options, URLs and local paths.
+    """
+    line = line.split(" #", 1)[0].strip()
+    if (
+        not line
+        or line.startswith(("#", "-", ".", "/"))
+        or "://" in line
+        or "@" in line
+    ):
+        return None
+    match = REQUIREMENT_RE.match(line)
+    if match is None:
+        return None
+    name, extras, rest = match.groups()
+    specifier, _, marker = rest.partition(";")
+    specifier = re.sub(r"\s+", "", specifier)
+    marker = " ".join(marker.split())
+    extras = (
+        ",".join(sorted(e.strip().lower() for e in extras[1:-1].split(",")))
+        if extras
+        else ""
+    )
+    pin = PIN_RE.match(specifier)
+    version = normalize_version(pin.group(1)) if pin else None
+    if version is not None:
+        specifier = f"=={version}"
+    normalized = normalize_name(name) + (f"[{extras}]" if extras else "") + specifier
+    if marker:
+        normalized += f"; {marker}"
+    return {
+        "name": normalize_name(name),
+        "version": version,
+        "normalized": normalized,
+    }
+
+
+def get_cache_key(normalized: str, python_version: str, platform_name: str) -> str:
+    data = f"{normalized}\n{python_version}\n{platform_name}"
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+
+def get_python_version(dockerfile: Optional[str]) -> str:
+    """Python of the builder stage (FROM python:X.Y...), this interpreter otherwise."""
+    if dockerfile and Path(dockerfile).exists():
+        match = DOCKERFILE_PYTHON_RE.search(Path(dockerfile).read_text())
+        if match:
+            return match.group(1)
+    return f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def get_wheel_project(wheel_path: Path):
+    """(normalized name, normalized version) from a wheel file name."""
+    parts = wheel_path.name[: -len(".whl")].split("-")
+    return normalize_name(parts[0]), normalize_version(parts[1])
+
+
+def plan_requirements(
+    requirements: str, python_version: str, platform_name: str
+) -> List[Dict]:
+    """
+    Cache key of every requirement line. Only exact pins are cached: the wheel of an
+    unpinned or URL requirement may change while its line stays the same.
+    """
+    items = []
+    with open(requirements, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            requirement = normalize_requirement(line)
+            if requirement is None or requirement["version"] is None:
+                items.append({"line": line, "key": None})
+                continue
+            key = get_cache_key(
+                requirement["normalized"], python_version, platform_name
+            )
+            items.append({**requirement, "line": line, "key": key})
+    return items
+
+
+def print_report(items: List[Dict]):
+    print(f'{"Status".ljust(10)}{"Key".ljust(34)}Requirement')
+    for item in items:
+        print(
+            item["status"].ljust(10) + str(item["key"] or "-").ljust(34) + item["line"]
+        )
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    output_path = os.getenv("GITHUB_OUTPUT")
+    if output_path:
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(f"wheelhouse_hits={counts.get('hit', 0)}\n")
+            f.write(f"wheelhouse_misses={counts.get('miss', 0)}\n")
+
+
+def restore(items: List[Dict], cache_dir: Path, wheelhouse: Path):
+    """Copies cached wheels of hits to the wheelhouse used as --find-links by the build."""
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    for item in items:
+        if item["key"] is None:
+            item["status"] = "uncached"
+            continue
+        wheels = sorted(cache_dir.joinpath(item["key"]).glob("*.whl"))
+        if not wheels:
+            item["status"] = "miss"
+            continue
+        for wheel in wheels:
+            shutil.copy2(wheel, wheelhouse.joinpath(wheel.name))
+        item["status"] = "hit"
+
+
+def save(items: List[Dict], cache_dir: Path, built_dir: Path):
+    """Stores the wheel of every pinned requirement that is not cached yet."""
+    built = {}
+    for wheel in built_dir.rglob("*.whl"):
+        built.setdefault(get_wheel_project(wheel), []).append(wheel)
+    for item in items:
+        if item["key"] is None:
+            item["status"] = "uncached"
+            continue
+        target = cache_dir.joinpath(item["key"])
+        if any(target.glob("*.whl")):
+            item["status"] = "cached"
+            continue
+        wheels = built.get((item["name"], item["version"]), [])
+        if not wheels:
+            item["status"] = "not built"
+            continue
+        # fill a temp dir and rename it, so a concurrent build never sees a partial entry
+        tmp_dir = cache_dir.joinpath(f".{item['key']}.{os.getpid()}.tmp")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        for wheel in wheels:
+            shutil.copy2(wheel, tmp_dir.joinpath(wheel.name))
+        tmp_dir.joinpath("requirement.txt").write_text(item["normalized"] + "\n")
+        try:
+            os.rename(tmp_dir, target)
+            item["status"] = "saved"
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            item["status"] = "cached"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Wheelhouse cache keyed by requirement line, Python version and platform"
+    )
+    parser.add_argument("command", choices=["key", "restore", "save"])
+    parser.add_argument("--requirements", required=True, help="Requirements file")
+    parser.add_argument(
+        "--cache-dir",
+        default="~/.cache/supervisely-wheelhouse",
+        help="Cache directory shared by builds on this runner",
+    )
+    parser.add_argument(
+        "--wheelhouse", default="wheelhouse", help="Where restore puts cached wheels"
+    )
+    parser.add_argument(
+        "--built", default="built_wheels", help="Wheels built by the image build"
+    )
+    parser.add_argument(
+        "--dockerfile",
+        default=None,
+        help="Dockerfile to read the builder Python version from",
+    )
+    parser.add_argument(
+        "--python-version", default=None, help="Python version of the builder"
+    )
+    parser.add_argument(
+        "--platform",
+        default=f"linux/{platform.machine().lower()}",
+        help="Platform of the builder",
+    )
+    args = parser.parse_args()
+
+    python_version = args.python_version or get_python_version(args.dockerfile)
+    print(f"Python {python_version}, platform {args.platform}")
+    items = plan_requirements(args.requirements, python_version, args.platform)
+    cache_dir = Path(args.cache_dir).expanduser()
+
+    if args.command == "key":
+        for item in items:
+            if item["key"] is None:
+                item["status"] = "uncached"
+            elif any(cache_dir.joinpath(item["key"]).glob("*.whl")):
+                item["status"] = "hit"
+            else:
+                item["status"] = "miss"
+    elif args.command == "restore":
+        restore(items, cache_dir, Path(args.wheelhouse))
+    else:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        save(items, cache_dir, Path(args.built))
+    print_report(items)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+import argparse
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SLYIGNORE_FILE = ".slyignore"
+
+# an archive without them cannot be released
+ALWAYS_ARCHIVED = ["config.json", "README.md"]
+
+
+def translate_pattern(pattern: str, base: str = "") -> Optional[Tuple[str, bool, bool]]:
+    """
+    (regex, negate, dir_only) of a gitignore-syntax line, None for blank lines and
+    comments. The regex matches a whole path relative to the repository root.
+    Like in gitignore, the pattern is relative to `base`, the directory of the file
+    it comes from, and only matches paths under it.
+    """
+    pattern = pattern.rstrip("\r\n")
+    # trailing spaces are dropped unless escaped with a backslash
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    # a slash anywhere but at the end anchors the pattern to the root
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = ""
+    i, n = 0, len(pattern)
+    while i < n:
+        at_segment_start = i == 0 or pattern[i - 1] == "/"
+        if at_segment_start and pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif at_segment_start and pattern.startswith("**", i) and i + 2 == n:
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex += re.escape("[")
+                i += 1
+                continue
+            chars = pattern[i + 1 : end]
+            if chars[0] in "!^":
+                chars = "^" + chars[1:]
+            regex += "[" + chars.replace("\\", "\\\\") + "]"
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    base = base.strip("/")
+    if base:
+        regex = re.escape(base + "/") + regex
+    return regex, negate, dir_only
+
+
+class IgnoreMatcher:
+    """
+    Gitignore-style rules compiled into two regexes, one for directories and one for
+    files. Rules are alternatives ordered from the last to the first, so the group of
+    the match is the last matching rule, like in git. Files under an excluded directory
+    are excluded even if a later rule re-includes them. Paths in `keep` are never
+    excluded.
+    """
+
+    def __init__(self, rules: List[Tuple[str, bool, bool]], keep=None):
+        self.rules = rules
+        self.keep = set(keep or [])
+        self._dir_regex, self._dir_negate = self._compile(rules)
+        self._file_regex, self._file_negate = self._compile(
+            [r for r in rules if not r[2]]
+        )
+        self._dirs: Dict[str, bool] = {}
+
+    @staticmethod
+    def _compile(rules):
+        if not rules:
+            return None, []
+        rules = list(reversed(rules))
+        regex = re.compile("|".join(f"({r[0]})" for r in rules), re.DOTALL)
+        return regex, [r[1] for r in rules]
+
+    @staticmethod
+    def _match(regex, negate, path: str) -> bool:
+        if regex is None:
+            return False
+        match = regex.fullmatch(path)
+        if match is None:
+            return False
+        return not negate[match.lastindex - 1]
+
+    def _is_dir_excluded(self, path: str) -> bool:
+        if path not in self._dirs:
+            parent = path.rpartition("/")[0]
+            self._dirs[path] = (
+                parent != "" and self._is_dir_excluded(parent)
+            ) or self._match(self._dir_regex, self._dir_negate, path)
+        return self._dirs[path]
+
+    def is_excluded(self, path: str) -> bool:
+        """`path` is a file path relative to the repository root, with forward slashes."""
+        return path not in self.keep and self.matches(path)
+
+    def matches(self, path: str) -> bool:
+        """Whether the rules exclude the path, regardless of `keep`."""
+        parent = path.rpartition("/")[0]
+        if parent and self._is_dir_excluded(parent):
+            return True
+        return self._match(self._file_regex, self._file_negate, path)
+
+
+def get_ignore_files(root, subapp_path=None) -> List[Path]:
+    files = [Path(root).joinpath(SLYIGNORE_FILE)]
+    if subapp_path:
+        files.append(Path(root).joinpath(subapp_path, SLYIGNORE_FILE))
+    return [f for f in files if f.is_file()]
+
+
+def load_ignore_matcher(root, subapp_path=None, keep=None) -> Optional[IgnoreMatcher]:
+    """
+    Rules of the repository .slyignore followed by the ones of the subapp .slyignore.
+    Patterns are relative to the directory of their file, so the subapp rules only
+    match files of the subapp. The subapp config.json and README.md and the paths in
+    `keep` (e.g. files referenced by the config) are never excluded. None if there
+    are no rules.
+    """
+    rules = []
+    for path in get_ignore_files(root, subapp_path):
+        base = path.parent.relative_to(Path(root)).as_posix()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                rule = translate_pattern(line, "" if base == "." else base)
+                if rule is not None:
+                    rules.append(rule)
+    if not rules:
+        return None
+    prefix = subapp_path.strip("/") + "/" if subapp_path else ""
+    return IgnoreMatcher(
+        rules, [prefix + name for name in ALWAYS_ARCHIVED] + list(keep or [])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List tracked files that .slyignore rules exclude from an app archive"
+    )
+    parser.add_argument(
+        "subapp_path",
+        nargs="?",
+        default=None,
+        help="Subapp directory, root app if omitted",
+    )
+    parser.add_argument("--root", default=".", help="Repository root")
+    args = parser.parse_args()
+
+    matcher = load_ignore_matcher(args.root, args.subapp_path)
+    if matcher is None:
+        print("No .slyignore rules")
+        return 0
+    paths = subprocess.check_output(
+        ["git", "ls-files", "--recurse-submodules"], cwd=args.root, text=True
+    ).splitlines()
+    excluded = [p for p in paths if matcher.is_excluded(p)]
+    size = 0
+    for path in excluded:
+        print(path)
+        full_path = os.path.join(args.root, path)
+        if os.path.isfile(full_path) and not os.path.islink(full_path):
+            size += os.path.getsize(full_path)
+    print(f"Excluded {len(excluded)} of {len(paths)} files ({size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+import math
+from typing import Dict, List
+
+PERCENTILES = [50, 90, 99]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear interpolation between closest ranks, same as numpy.percentile default."""
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def get_stats(values: List[float]) -> Dict[str, float]:
+    try:
+        # imported on first use, sync_models imports this module at startup
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        arr = np.asarray(values, dtype=np.float64)
+        stats = {"mean": float(arr.mean()), "std": float(arr.std())}
+        for q, value in zip(PERCENTILES, np.percentile(arr, PERCENTILES)):
+            stats[f"p{q}"] = float(value)
+        return stats
+    mean = sum(values) / len(values)
+    stats = {
+        "mean": mean,
+        "std": math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)),
+    }
+    for q in PERCENTILES:
+        stats[f"p{q}"] = percentile(values, q)
+    return stats
+
+
+def is_number(value) -> bool:
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    )
+
+
+def get_samples(test: Dict) -> Dict[str, List[float]]:
+    """
+    Raw samples of a speed test as metric -> latencies in ms. Samples are either
+    numbers (total latency) or dicts like {"total": 12.1, "inference": 10.3, ...}.
+    Non-numeric values (e.g. "device": "cuda") are not latencies and are skipped.
+    """
+    samples = {}
+    for sample in test.get("samples", []):
+        if isinstance(sample, dict):
+            for metric, value in sample.items():
+                if is_number(value):
+                    samples.setdefault(metric, []).append(value)
+        elif is_number(sample):
+            samples.setdefault("total", []).append(sample)
+    return samples
+
+
+def summarize_speed_test(test: Dict, precision: int = 3) -> Dict:
+    """
+    Replaces the raw samples of one speed test with their statistics. All other keys
+    of the test are kept as they are; "stats" (mean, std, p50, p90, p99 per metric),
+    "num_samples" and "throughput" are added next to them unless the test already
+    has these keys.
+    """
+    summary = {k: v for k, v in test.items() if k != "samples"}
+    stats = {}
+    num_samples = 0
+    for metric, values in get_samples(test).items():
+        num_samples = max(num_samples, len(values))
+        stats[metric] = {k: round(v, precision) for k, v in get_stats(values).items()}
+    summary.setdefault("stats", stats)
+    summary.setdefault("num_samples", num_samples)
+    total = stats.get("total", {}).get("mean")
+    batch_size = test.get("batch_size", 1)
+    if total and is_number(batch_size):
+        # images per second
+        summary.setdefault("throughput", round(batch_size * 1000 / total, precision))
+    return summary
+
+
+def summarize_speed_tests(speed_tests: List[Dict], precision: int = 3) -> List[Dict]:
+    """Summarizes every test with raw samples, other tests are kept as they are."""
+    return [
+        (
+            summarize_speed_test(test, precision)
+            if isinstance(test, dict)
+            and isinstance(test.get("samples"), list)
+            and test["samples"]
+            else test
+        )
+        for test in speed_tests
+    ]
+
+
+def summarize_model_speed_tests(model: Dict) -> int:
+    """Summarizes speed tests of a model config in place. Returns the number of raw samples."""
+    speed_tests = model.get("speed_tests")
+    if not isinstance(speed_tests, list):
+        return 0
+    num_samples = sum(
+        len(t["samples"])
+        for t in speed_tests
+        if isinstance(t, dict) and isinstance(t.get("samples"), list)
+    )
+    if num_samples:
+        model["speed_tests"] = summarize_speed_tests(speed_tests)
+    return num_samples
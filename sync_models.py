@@ -0,0 +1,1135 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from get_inputs import discover_train_configs
+from release_history import get_state_dir
+from speed_tests import summarize_model_speed_tests
+
+# import dotenv; dotenv.load_dotenv(os.path.expanduser("~/supervisely.env"))
+
+
+MODEL_KEY_MAPPING = {
+    "Model": "name",
+    "model_name": "name",
+    "framework": "framework",
+    ("meta", "task_type"): "task",
+    "architecture": "architecture",
+    "pretrained": "pretrained",
+    "modality": "modality",
+    "num_classes": "numClasses",
+    "size": "size",
+    "Params(M)": "paramsM",
+    "Params (M)": "paramsM",
+    "GFLOPs": "GFLOPs",
+    "serve_module_id": "serveModuleId",
+    "train_module_id": "trainModuleId",
+    "tags": "tags",
+    "runtimes": "runtimes",
+    "files": "files",
+    "speed_tests": "speedTests",
+    "evaluation": "evaluation",
+    "task": "task",
+}
+
+# update_models.py also accepted this alias, release_models.py never did, so adds do not
+UPDATE_KEY_MAPPING = {**MODEL_KEY_MAPPING, "params (M)": "paramsM"}
+
+
+def get_value(data: dict, keys: Union[str, List[str]]):
+    if isinstance(keys, str):
+        return data.get(keys)
+    else:
+        value = data
+        for key in keys:
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                return None
+        return value
+
+
+# set once at creation, the serve/train apps found at sync time may be different ones
+ADD_ONLY_FIELDS = ["serveModuleId", "trainModuleId"]
+
+ENTRY_KEYS = [
+    "framework",
+    "models_path",
+    "det_models_path",
+    "seg_models_path",
+    "pose_models_path",
+]
+
+
+class SyncConfig:
+    """Connection and concurrency settings of a model sync run."""
+
+    def __init__(
+        self,
+        server_address: str,
+        api_token: str,
+        pagination_workers: int = 8,
+        workers: int = 4,
+        rate_limit: float = 5,
+        max_retries: int = 3,
+        retry_delay: float = 2,
+        modules_cache_ttl: float = 6 * 3600,
+        modules_cache_path: str = None,
+        journal_ttl: float = 0,
+        journal_path: str = None,
+        timeout: float = 60,
+    ):
+        self.server_address = server_address
+        self.api_token = api_token
+        self.pagination_workers = pagination_workers
+        self.workers = workers
+        self.rate_limit = rate_limit  # requests per second, 0 = no limit
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay  # seconds, doubled after every retry
+        self.modules_cache_ttl = modules_cache_ttl  # seconds, 0 = always list modules
+        self.modules_cache_path = modules_cache_path
+        self.journal_ttl = journal_ttl  # seconds, 0 = no journal
+        self.journal_path = journal_path
+        self.timeout = timeout  # seconds per request
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            server_address=os.environ["SUPERVISELY_PROD_SERVER_ADDRESS"],
+            api_token=os.environ["SUPERVISELY_PROD_API_TOKEN"],
+            pagination_workers=int(os.environ.get("PAGINATION_WORKERS", 8)),
+            workers=int(os.environ.get("SYNC_WORKERS", 4)),
+            rate_limit=float(os.environ.get("SYNC_RATE_LIMIT", 5)),
+            max_retries=int(os.environ.get("SYNC_MAX_RETRIES", 3)),
+            retry_delay=float(os.environ.get("SYNC_RETRY_DELAY", 2)),
+            modules_cache_ttl=float(os.environ.get("MODULES_CACHE_TTL", 6 * 3600)),
+            modules_cache_path=os.environ.get("MODULES_CACHE_PATH", None),
+            journal_ttl=float(os.environ.get("SYNC_JOURNAL_TTL", 0)),
+            journal_path=os.environ.get("SYNC_JOURNAL_PATH", None),
+            timeout=float(os.environ.get("SYNC_TIMEOUT", 60)),
+        )
+
+
+def get_env_entry() -> Dict:
+    """Framework and model files set with FRAMEWORK and *_MODELS_PATH env vars."""
+    return {
+        "framework": os.environ.get("FRAMEWORK", ""),
+        "models_path": os.environ.get("MODELS_PATH", ""),
+        "det_models_path": os.environ.get("DET_MODELS_PATH", ""),
+        "seg_models_path": os.environ.get("SEG_MODELS_PATH", ""),
+        "pose_models_path": os.environ.get("POSE_MODELS_PATH", ""),
+    }
+
+
+class ModelsClient:
+    """
+    Ecosystem models API. The HTTP session is created on first use, so constructing
+    a client costs nothing and does no network I/O.
+    """
+
+    def __init__(self, config: SyncConfig):
+        self.config = config
+        self._session = None
+        self._lock = threading.Lock()
+        self.modules_cache = ModulesCache(self)
+        self.journal = SyncJournal(self.config)
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                # one keep-alive pool shared by all API calls, sized for the concurrent requests
+                pool_size = max(self.config.pagination_workers, self.config.workers)
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_maxsize=pool_size))
+                session.mount("https://", HTTPAdapter(pool_maxsize=pool_size))
+                self._session = session
+        return self._session
+
+    def api_call(self, api_method, endpoint, params=None, data=None, json=None):
+        session = self.session
+        call_function = session.post if api_method == "post" else session.get
+        url = (
+            self.config.server_address.rstrip("/")
+            + "/public/api/v3/"
+            + endpoint.lstrip("/")
+        )
+        headers = {
+            "x-api-key": self.config.api_token,
+        }
+        r = call_function(
+            url,
+            params=params,
+            data=data,
+            json=json,
+            headers=headers,
+            timeout=self.config.timeout,
+        )
+        try:
+            r.raise_for_status()
+        except Exception:
+            print(f"Error calling API method {api_method} on endpoint {endpoint}")
+            print(f"Response: {r.text}")
+            raise
+        return r.json()
+
+    def get(self, method, params=None, data=None, json=None):
+        return self.api_call("get", method, params=params, data=data, json=json)
+
+    def post(self, method, params=None, data=None, json=None):
+        return self.api_call("post", method, params=params, data=data, json=json)
+
+    def get_list_all_pages(self, method, data, api_method="get"):
+        # same as ApiField.SORT, ApiField.ID and ApiField.SORT_ORDER
+        if "sort" not in data:
+            data["sort"] = "id"
+            data["sort_order"] = "asc"
+
+        def request(request_data):
+            if api_method == "post":
+                return self.post(method, json=request_data)
+            return self.get(method, data=request_data)
+
+        first_response = request(data)
+        total = first_response["total"]
+        per_page = first_response["perPage"]
+        pages_count = first_response["pagesCount"]
+
+        results = first_response["entities"]
+
+        if pages_count == 1 and len(results) == total:
+            pass
+        else:
+
+            def get_page(page_idx):
+                page_data = {**data, "page": page_idx, "per_page": per_page}
+                return request(page_data)["entities"]
+
+            # page count is known after the first response, fetch the rest concurrently
+            workers = max(1, min(self.config.pagination_workers, pages_count - 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for page_items in executor.map(get_page, range(2, pages_count + 1)):
+                    results.extend(page_items)
+
+            if len(results) != total:
+                raise RuntimeError(
+                    "Method {!r}: error during pagination, some items are missed".format(
+                        method
+                    )
+                )
+
+        return results
+
+    def list_models(self):
+        data = {
+            "localModels": self.config.server_address != "https://app.supervisely.com",
+        }
+        return self.get_list_all_pages("ecosystem.models.list", data=data)
+
+    def add_model(self, parameters: dict):
+        required_keys = ["name", "framework", "task"]
+        defaults = {"modality": "image"}
+        data = model_config_to_request(parameters)
+        for key, value in defaults.items():
+            if key not in data:
+                data[key] = value
+        missing_keys = [k for k in required_keys if k not in data]
+        if missing_keys:
+            raise ValueError(f"Missing required parameters: {missing_keys}")
+        return self.post("ecosystem.models.add", json=data)
+
+    def update_model(self, model_id: int, changed_fields: dict):
+        data = {**changed_fields, "id": model_id}
+        return self.post(f"ecosystem.models.update", json=data)
+
+    def list_framework_modules(self) -> Dict[str, Dict[str, List[int]]]:
+        """
+        Serve and train module ids of all frameworks with a single ecosystem listing.
+        A module belongs to a framework if its config has the "framework:<name>" category.
+        """
+        data = {"categories": ["serve", "train"], "categoriesOperation": "or"}
+        modules = self.get_list_all_pages(
+            "ecosystem.list", data=data, api_method="post"
+        )
+        frameworks = {}
+        for module in modules:
+            categories = module.get("config", {}).get("categories", [])
+            for category in categories:
+                if not category.startswith("framework:"):
+                    continue
+                ids = frameworks.setdefault(category[len("framework:") :], {})
+                for kind in ["serve", "train"]:
+                    if kind in categories:
+                        ids.setdefault(f"{kind}_module_ids", []).append(module["id"])
+        return frameworks
+
+    def find_serve_and_train_modules(self, framework) -> Tuple[int, int]:
+        """Serve and train module ids of the framework, see `ModulesCache`."""
+        return self.modules_cache.get(framework)
+
+
+def get_modules_cache_path() -> Path:
+    return get_state_dir().joinpath("ecosystem_modules.json")
+
+
+def get_journal_path() -> Path:
+    return get_state_dir().joinpath("model_sync_journal.jsonl")
+
+
+def get_server_key(server_address: str) -> str:
+    return server_address.split("://", 1)[-1].rstrip("/")
+
+
+MODULE_ID_KEYS = ["serve_module_ids", "train_module_ids"]
+
+
+class ModulesCache:
+    """
+    Framework -> serve/train module ids of a server, kept on the runner for `modules_cache_ttl`
+    seconds. All frameworks are refreshed with one listing when the cache is expired,
+    invalidated, or misses a framework (its apps may have been published since).
+    Of several serve or train modules of a framework the lowest id is used, with a warning.
+    """
+
+    def __init__(self, client: "ModelsClient"):
+        self.client = client
+        self.path = Path(client.config.modules_cache_path or get_modules_cache_path())
+        self.server_key = get_server_key(client.config.server_address)
+        self._lock = threading.Lock()
+        self._entry = None
+        self._refreshed = False
+
+    def _load_all(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"WARNING: Could not read modules cache from {self.path}: {e}")
+            return {}
+
+    def _update(self, entry):
+        """Replaces (or with None removes) the server entry in the cache file."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            cache = self._load_all()
+            if entry is None:
+                cache.pop(self.server_key, None)
+            else:
+                cache[self.server_key] = entry
+            # write to a temp file first so concurrent jobs never read a partial file
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"WARNING: Could not update modules cache {self.path}: {e}")
+
+    def _is_fresh(self, entry) -> bool:
+        if entry is None or self.client.config.modules_cache_ttl <= 0:
+            return False
+        return (
+            time.time() - entry.get("updated_at", 0)
+            < self.client.config.modules_cache_ttl
+        )
+
+    def refresh(self):
+        frameworks = self.client.list_framework_modules()
+        self._entry = {"updated_at": time.time(), "frameworks": frameworks}
+        self._refreshed = True
+        self._update(self._entry)
+        print(f"Listed serve/train modules of {len(frameworks)} frameworks")
+
+    def invalidate(self):
+        """Drops the cached modules of the server, the next lookup lists them again."""
+        with self._lock:
+            self._entry = None
+            self._refreshed = False
+            self._update(None)
+
+    def get(self, framework) -> Tuple[int, int]:
+        with self._lock:
+            if self._entry is None:
+                entry = self._load_all().get(self.server_key)
+                if self._is_fresh(entry):
+                    self._entry = entry
+                else:
+                    self.refresh()
+            ids = self._entry["frameworks"].get(framework, {})
+            if not self._refreshed and not all(k in ids for k in MODULE_ID_KEYS):
+                self.refresh()
+                ids = self._entry["frameworks"].get(framework, {})
+        if not all(ids.get(k) for k in MODULE_ID_KEYS):
+            raise RuntimeError(
+                f"Could not find serve or train modules for framework {framework}. "
+                "This may mean that the apps are not yet published"
+            )
+        module_ids = []
+        for key in MODULE_ID_KEYS:
+            candidates = sorted(set(ids[key]))
+            if len(candidates) > 1:
+                print(
+                    f"WARNING: {key.split('_')[0]} modules {candidates} all have category "
+                    f"framework:{framework}, using the lowest id {candidates[0]}"
+                )
+            module_ids.append(candidates[0])
+        return module_ids[0], module_ids[1]
+
+
+def get_payload_hash(model: Dict) -> str:
+    """Hash of the fields compared on update, module ids are set once on add and not included."""
+    data = {
+        k: v
+        for k, v in model_config_to_request(model, UPDATE_KEY_MAPPING).items()
+        if k not in ADD_ONLY_FIELDS
+    }
+    payload = json.dumps(normalize_value(data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SyncJournal:
+    """
+    Append-only log of models confirmed on a server: added, updated, or found equal.
+    Disabled unless `journal_ttl` is set. A rerun skips models whose payload hash was
+    confirmed less than `journal_ttl` seconds ago without asking the server, so an
+    interrupted sync resumes where it stopped.
+    """
+
+    def __init__(self, config: SyncConfig):
+        self.path = Path(config.journal_path or get_journal_path())
+        self.server_key = get_server_key(config.server_address)
+        self.ttl = config.journal_ttl
+        self._lock = threading.Lock()
+        self._records = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _load(self) -> Dict[Tuple[str, str], Dict]:
+        if self._records is not None:
+            return self._records
+        self._records = {}
+        if not self.enabled or not self.path.exists():
+            return self._records
+        min_time = time.time() - self.ttl
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be cut by a killed run
+                    continue
+                if record.get("server") != self.server_key:
+                    continue
+                if record.get("reset"):
+                    self._records.clear()
+                    continue
+                key = (record.get("framework"), record.get("name"))
+                if record.get("time", 0) < min_time:
+                    self._records.pop(key, None)
+                else:
+                    self._records[key] = record
+        return self._records
+
+    def is_confirmed(self, model: Dict, update=True) -> bool:
+        """With update the server copy must match the payload, otherwise it only must exist."""
+        if not self.enabled:
+            return False
+        record = self._load().get((model.get("framework"), get_model_name(model)))
+        if record is None:
+            return False
+        return not update or record.get("payload_hash") == get_payload_hash(model)
+
+    def _append(self, record: Dict):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # one short write per line keeps records intact when jobs share a runner
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record(self, model: Dict, action: str, model_id=None):
+        """action is add, update, unchanged (payload equal) or exists (payload not compared)."""
+        if not self.enabled:
+            return
+        record = {
+            "server": self.server_key,
+            "framework": model.get("framework"),
+            "name": get_model_name(model),
+            "action": action,
+            "payload_hash": None if action == "exists" else get_payload_hash(model),
+            "model_id": model_id,
+            "time": time.time(),
+            "at": datetime.datetime.utcnow().isoformat(),
+        }
+        try:
+            self._append(record)
+        except Exception as e:
+            print(f"WARNING: Could not write sync journal {self.path}: {e}")
+
+    def reset(self):
+        """Forgets all confirmations for the server, the next run compares every model again."""
+        self._records = None
+        if self.path.exists():
+            self._append(
+                {"server": self.server_key, "reset": True, "time": time.time()}
+            )
+
+
+def model_config_to_request(model_config: dict, key_mapping: dict = None) -> dict:
+    data = {}
+    for k, api_k in (key_mapping or MODEL_KEY_MAPPING).items():
+        value = get_value(model_config, k)
+        if value is not None:
+            data[api_k] = value
+    return data
+
+
+# segmentation models are updated but never added, like in the original release_models.py
+SEG_MODEL_MARK = "_from_seg_models_path"
+
+
+def index_models(models: List[Dict]) -> Dict[Tuple[str, str], Dict]:
+    return {(m.get("framework"), m.get("name")): m for m in models}
+
+
+def normalize_value(value):
+    """Makes values comparable regardless of key order and 1 vs 1.0."""
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def get_changed_fields(data: dict, existing_model: dict) -> dict:
+    """
+    Fields of the update request that differ from the server record. Fields the
+    record does not have are changed, so they are set by the update.
+    """
+    return {
+        key: value
+        for key, value in data.items()
+        if key not in ADD_ONLY_FIELDS
+        and normalize_value(value) != normalize_value(existing_model.get(key))
+    }
+
+
+def format_change(key, old_value, new_value) -> str:
+    scalar_types = (str, int, float, bool, type(None))
+    if isinstance(old_value, scalar_types) and isinstance(new_value, scalar_types):
+        return f"{key}: {str(old_value)[:40]!r} -> {str(new_value)[:40]!r}"
+    # large blobs (files, speedTests, evaluation) are summarized by size only
+    old_size = len(json.dumps(old_value)) if old_value is not None else 0
+    return f"{key}: changed ({old_size} -> {len(json.dumps(new_value))} bytes)"
+
+
+def get_task_type(model: Dict, default: str) -> str:
+    task_type = model.get("task_type", None)
+    if task_type is None:
+        task_type = model.get("meta", {}).get("task_type", None)
+    if task_type is None:
+        task_type = default
+    return task_type
+
+
+def read_models(
+    framework,
+    models_path="",
+    det_models_path="",
+    seg_models_path="",
+    pose_models_path="",
+):
+    models = []
+    if models_path != "":
+        models.extend(json.load(open(models_path, "r")))
+    if det_models_path != "":
+        det_models = json.load(open(det_models_path, "r"))
+        for model in det_models:
+            model["task"] = get_task_type(model, "object detection")
+            models.append(model)
+    if seg_models_path != "":
+        seg_models = json.load(open(seg_models_path, "r"))
+        for model in seg_models:
+            model["task"] = get_task_type(model, "instance segmentation")
+            model[SEG_MODEL_MARK] = True
+            models.append(model)
+    if pose_models_path != "":
+        print("Pose estimation models are not supported yet.")
+        # pose_models = json.load(open(pose_models_path, "r"))
+        # for model in pose_models:
+        #     model["task"] = "pose_estimation"
+        #     models.append(model)
+    for model in models:
+        model["framework"] = framework
+        evaluation = get_evaluation(model)
+        if evaluation:
+            model["evaluation"] = evaluation
+    return models
+
+
+def get_model_name(model: Dict) -> str:
+    if "model_name" in model:
+        return model["model_name"]
+    if "Model" in model:
+        return model["Model"]
+    if "name" in model:
+        return model["name"]
+    return
+
+
+def get_evaluation(model: Dict) -> Dict:
+    for key in ["mAP", "AP_val", "mAP (mask)"]:
+        if key in model:
+            return {
+                "metrics": {"mAP": model[key], "primaryKey": "mAP"},
+            }
+    return None
+
+
+REQUIRED_FIELDS = ["name", "framework", "task"]
+
+DEFAULT_FIELDS = {"modality": "image"}
+
+NUMBER_FIELDS = ["numClasses", "paramsM", "GFLOPs"]
+
+FIELD_TYPES = {
+    "name": str,
+    "framework": str,
+    "task": str,
+    "modality": str,
+    "architecture": str,
+    "tags": list,
+    "runtimes": list,
+    "files": dict,
+    "speedTests": list,
+    "evaluation": dict,
+}
+
+# larger requests are reported, big blobs usually mean speed tests or evaluation were inlined by mistake
+MAX_PAYLOAD_SIZE = 1024 * 1024
+
+
+def is_number(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def validate_model(model: Dict) -> List[str]:
+    """Problems of the request built from a model config, empty if it can be sent."""
+    errors = []
+    for k, api_k in MODEL_KEY_MAPPING.items():
+        # aliases must agree, otherwise the last one silently wins
+        value = get_value(model, k)
+        if value is None:
+            continue
+        for other_k, other_api_k in MODEL_KEY_MAPPING.items():
+            if other_k == k or other_api_k != api_k:
+                continue
+            other_value = get_value(model, other_k)
+            if (
+                other_value is not None
+                and other_value != value
+                and str(k) < str(other_k)
+            ):
+                errors.append(
+                    f"conflicting values for {api_k!r}: {k!r} and {other_k!r}"
+                )
+    data = {**DEFAULT_FIELDS, **model_config_to_request(model)}
+    for key in REQUIRED_FIELDS:
+        if data.get(key) in [None, ""]:
+            errors.append(f"missing required field {key!r}")
+    for key, expected_type in FIELD_TYPES.items():
+        if key in data and not isinstance(data[key], expected_type):
+            errors.append(
+                f"{key!r} must be {expected_type.__name__}, got {type(data[key]).__name__}"
+            )
+    for key in NUMBER_FIELDS:
+        if key in data and not is_number(data[key]):
+            errors.append(f"{key!r} must be a number, got {data[key]!r}")
+    return errors
+
+
+def preflight(
+    entries: List[Dict], summarize_speed_tests=False
+) -> Tuple[List[List[Dict]], List[str]]:
+    """
+    Reads and validates the model files of all entries without any network I/O.
+    With summarize_speed_tests raw speed test samples are replaced by their statistics.
+    Returns the models of every entry and the list of errors.
+    """
+    models_per_entry = []
+    errors = []
+    seen = {}
+    sizes = []
+    num_samples = 0
+    for entry in entries:
+        try:
+            models = read_models(**entry)
+        except Exception as e:
+            errors.append(f"{entry.get('framework')}: could not read model files: {e}")
+            models_per_entry.append([])
+            continue
+        models_per_entry.append(models)
+        for idx, model in enumerate(models):
+            if not isinstance(model, dict):
+                errors.append(f"{entry['framework']}: model #{idx} is not an object")
+                continue
+            if summarize_speed_tests:
+                num_samples += summarize_model_speed_tests(model)
+            model_name = get_model_name(model)
+            label = f"{entry['framework']}/{model_name if model_name else f'#{idx}'}"
+            errors.extend(f"{label}: {e}" for e in validate_model(model))
+            key = (model.get("framework"), model_name)
+            if model_name and key in seen:
+                errors.append(
+                    f"{label}: duplicate model name, also defined in {seen[key]}"
+                )
+            seen.setdefault(key, entry.get("models_path") or label)
+            size = len(json.dumps(model_config_to_request(model)))
+            sizes.append((size, label))
+    if num_samples:
+        print(f"Summarized {num_samples} raw speed test samples")
+    if sizes:
+        total = sum(size for size, _ in sizes)
+        largest, largest_label = max(sizes)
+        print(
+            f"Preflight: {len(sizes)} models, payload ~{total / 1024:.1f} KB, "
+            f"largest {largest_label} ~{largest / 1024:.1f} KB"
+        )
+        for size, label in sizes:
+            if size > MAX_PAYLOAD_SIZE:
+                print(
+                    f"WARNING: {label}: request payload is {size / 1024 / 1024:.1f} MB"
+                )
+    return models_per_entry, errors
+
+
+def build_plan(models: List[Dict], existing_models: List[Dict], add=True, update=True):
+    """
+    Classifies every local model in one pass against the server models indexed by
+    (framework, name): add if missing, update if any field differs, unchanged otherwise.
+    A model is only added if no server model of any framework has its name, and models
+    from seg_models_path are never added.
+    """
+    existing_index = index_models(existing_models)
+    existing_names = {m.get("name") for m in existing_models}
+    plan = {"add": [], "update": [], "unchanged": []}
+    skipped_seg_models = []
+    for model in models:
+        model_name = get_model_name(model)
+        existing_model = existing_index.get((model.get("framework"), model_name))
+        if existing_model is None:
+            if not add:
+                continue
+            if model.get(SEG_MODEL_MARK):
+                skipped_seg_models.append(model_name)
+            elif model_name in existing_names:
+                print(
+                    f"Model {model_name} exists in another framework, it will not be added"
+                )
+            else:
+                plan["add"].append(model)
+            continue
+        if not update:
+            plan["unchanged"].append(model)
+            continue
+        data = model_config_to_request(model, UPDATE_KEY_MAPPING)
+        changed_fields = get_changed_fields(data, existing_model)
+        if changed_fields:
+            plan["update"].append((existing_model, model, changed_fields))
+        else:
+            plan["unchanged"].append(model)
+    if skipped_seg_models:
+        print(
+            f"Segmentation models are not supported yet, not added: {skipped_seg_models}"
+        )
+    return plan
+
+
+def print_plan(plan):
+    print()
+    print(f"Unchanged models: {len(plan['unchanged'])}")
+    print("Models to add:   ", [get_model_name(m) for m in plan["add"]])
+    print("Models to update:", [get_model_name(m) for _, m, _ in plan["update"]])
+    for existing_model, model, changed_fields in plan["update"]:
+        print(f"{get_model_name(model)}:")
+        for key, value in changed_fields.items():
+            print(f"  {format_change(key, existing_model.get(key), value)}")
+    print()
+
+
+class RateLimiter:
+    """Spaces out calls shared by all worker threads to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """Server errors and network issues are retried, bad requests are not."""
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code >= 500
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+def find_added_model(client: ModelsClient, model: Dict):
+    """
+    Server copy of a model whose add request failed. Adds are not idempotent: a request
+    that timed out or got a 5xx may still have created the model, so it is looked up
+    before the add is retried.
+    """
+    key = (model.get("framework"), get_model_name(model))
+    return index_models(client.list_models()).get(key)
+
+
+def run_operation(
+    client: ModelsClient, action, model, existing_model, changed_fields, rate_limiter
+):
+    config = client.config
+    model_name = get_model_name(model)
+    result = {"action": action, "name": model_name, "success": False, "attempts": 0}
+    delay = config.retry_delay
+    for attempt in range(1, config.max_retries + 1):
+        result["attempts"] = attempt
+        rate_limiter.wait()
+        try:
+            added_model = None
+            if action == "add" and attempt > 1:
+                added_model = find_added_model(client, model)
+            if added_model is not None:
+                model_id = added_model["id"]
+                result["message"] = (
+                    f"Added model: {model_name} with ID {model_id} (by a previous attempt)"
+                )
+            elif action == "add":
+                response = client.add_model(model)
+                model_id = response["id"]
+                result["message"] = f"Added model: {model_name} with ID {model_id}"
+            else:
+                client.update_model(existing_model["id"], changed_fields)
+                model_id = existing_model["id"]
+                result["message"] = f"Updated model: {model_name} with ID {model_id}"
+            result["success"] = True
+            client.journal.record(model, action, model_id)
+            break
+        except Exception as e:
+            result["message"] = f"Failed to {action} model {model_name}: {e}"
+            if not is_retryable_error(e) or attempt == config.max_retries:
+                break
+            print(
+                f"Attempt {attempt}/{config.max_retries} to {action} {model_name} failed: {e}. "
+                f"Retrying in {delay}s..."
+            )
+            time.sleep(delay)
+            delay *= 2
+    print(result["message"])
+    return result
+
+
+def print_summary(results):
+    success_count = sum(1 for r in results if r["success"])
+    print()
+    print(f"Total: {len(results)} operations. Success: {success_count}/{len(results)}")
+    print(f'{"Result".ljust(10)}{"Action".ljust(10)}{"Attempts".ljust(10)}Model')
+    for r in results:
+        status = "[OK]" if r["success"] else "[FAIL]"
+        print(
+            status.ljust(10)
+            + r["action"].ljust(10)
+            + str(r["attempts"]).ljust(10)
+            + str(r["name"])
+        )
+    print()
+
+
+def execute_plan(client: ModelsClient, plan) -> bool:
+    """
+    Runs adds and updates with `config.workers` threads, at most `config.rate_limit`
+    requests per second and up to `config.max_retries` attempts per model for
+    transient errors. A failed add is retried only if the model is not on the server.
+    """
+    operations = [("add", model, None, None) for model in plan["add"]]
+    operations.extend(
+        ("update", model, existing_model, changed_fields)
+        for existing_model, model, changed_fields in plan["update"]
+    )
+    rate_limiter = RateLimiter(client.config.rate_limit)
+    workers = max(1, min(client.config.workers, len(operations)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map keeps the plan order for the summary regardless of completion order
+        results = list(
+            executor.map(
+                lambda op: run_operation(client, *op, rate_limiter), operations
+            )
+        )
+    print_summary(results)
+    return all(r["success"] for r in results)
+
+
+def plan_framework(
+    client: ModelsClient,
+    entry: Dict,
+    models: List[Dict],
+    existing_models: List[Dict],
+    add=True,
+    update=True,
+):
+    """Plan for the models of one framework/model-files entry."""
+    plan = build_plan(models, existing_models, add=add, update=update)
+    if plan["add"]:
+        try:
+            serve_id, train_id = client.find_serve_and_train_modules(entry["framework"])
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            print("New models will not be added.")
+            plan["add"] = []
+        else:
+            for model in plan["add"]:
+                model["serve_module_id"] = serve_id
+                model["train_module_id"] = train_id
+    return plan
+
+
+def print_preflight_errors(errors: List[str]):
+    print(f"Preflight failed with {len(errors)} errors, no models were sent:")
+    for error in errors:
+        print(f"  {error}")
+
+
+def sync_frameworks(
+    client: ModelsClient,
+    entries: List[Dict],
+    add=True,
+    update=True,
+    summarize_speed_tests=False,
+) -> bool:
+    """
+    Syncs models of all entries with a single listing of server models and one plan.
+    Nothing is sent if any model file fails the preflight check.
+    Returns False if any model failed to sync.
+    """
+    models_per_entry, errors = preflight(entries, summarize_speed_tests)
+    if errors:
+        print_preflight_errors(errors)
+        return False
+    confirmed = 0
+    for idx, models in enumerate(models_per_entry):
+        pending = [
+            m for m in models if not client.journal.is_confirmed(m, update=update)
+        ]
+        confirmed += len(models) - len(pending)
+        models_per_entry[idx] = pending
+    if confirmed:
+        print(f"Skipping {confirmed} models already confirmed by the sync journal")
+    if not any(models_per_entry):
+        print("No models to add or update.")
+        return True
+
+    existing_models = client.list_models()
+    plan = {"add": [], "update": [], "unchanged": []}
+    for entry, models in zip(entries, models_per_entry):
+        if not models:
+            continue
+        print(f"Framework: {entry['framework']}")
+        framework_plan = plan_framework(
+            client, entry, models, existing_models, add=add, update=update
+        )
+        for key, items in framework_plan.items():
+            plan[key].extend(items)
+    for model in plan["unchanged"]:
+        client.journal.record(model, "unchanged" if update else "exists")
+    print_plan(plan)
+    if not plan["add"] and not plan["update"]:
+        print("No models to add or update.")
+        return True
+
+    if execute_plan(client, plan):
+        print("All models synced successfully.")
+        return True
+    print("Some models failed to sync. Please check the logs above.")
+    return False
+
+
+def get_summarize_speed_tests() -> bool:
+    summarize = os.getenv("SUMMARIZE_SPEED_TESTS", False)
+    return summarize in [1, "1", "true", "True", True]
+
+
+def sync(
+    add=True,
+    update=True,
+    config: SyncConfig = None,
+    entry: Dict = None,
+    refresh_modules=False,
+    summarize_speed_tests=None,
+    reset_journal=False,
+):
+    """Syncs one framework, configured with env vars unless config and entry are given."""
+    if summarize_speed_tests is None:
+        summarize_speed_tests = get_summarize_speed_tests()
+    if entry is None:
+        entry = get_env_entry()
+    if entry.get("models_path", "") == "" or entry.get("framework", "") == "":
+        print("Models path or framework is not set. Models will not be synced.")
+        sys.exit(0)
+    client = ModelsClient(config or SyncConfig.from_env())
+    if refresh_modules:
+        client.modules_cache.invalidate()
+    if reset_journal:
+        client.journal.reset()
+    if not sync_frameworks(
+        client,
+        [entry],
+        add=add,
+        update=update,
+        summarize_speed_tests=summarize_speed_tests,
+    ):
+        sys.exit(1)
+
+
+def load_manifest(manifest_path) -> List[Dict]:
+    """
+    Manifest is a JSON list of entries:
+    [{"framework": "YOLO", "models_path": "supervisely_integration/models.json"}, ...]
+    Optional keys: det_models_path, seg_models_path, pose_models_path.
+    """
+    with open(manifest_path, "r") as f:
+        entries = json.load(f)
+    for entry in entries:
+        unknown_keys = [k for k in entry if k not in ENTRY_KEYS]
+        if unknown_keys or not entry.get("framework"):
+            raise ValueError(f"Invalid manifest entry: {entry}")
+    return entries
+
+
+def main():
+    """Mode path and framework could be obtained automatically from configs of the apps
+
+    Example of config file:
+    ```
+        {
+            "framework": {
+                "name": "SparseInst"
+            },
+            "files": {
+                "models": "models/models.json"
+            }
+        }
+    ```
+
+    Many frameworks are synced in one process with --manifest or --discover.
+    """
+    parser = argparse.ArgumentParser(description="Add and update ecosystem models.")
+    parser.add_argument("--manifest", help="JSON list of framework/model-file entries")
+    parser.add_argument(
+        "--discover",
+        nargs="?",
+        const=".",
+        help="Find every train config.json with framework.name and files.models under this dir",
+    )
+    parser.add_argument("--no-add", action="store_true", help="Do not add new models")
+    parser.add_argument(
+        "--no-update", action="store_true", help="Do not update existing models"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only validate the model files, without credentials or network access",
+    )
+    parser.add_argument(
+        "--summarize-speed-tests",
+        action="store_true",
+        help="Replace raw speed test samples with mean/p50/p90/p99/throughput before upload",
+    )
+    parser.add_argument(
+        "--reset-journal",
+        action="store_true",
+        help="Forget models confirmed by previous runs and compare all of them with the server",
+    )
+    parser.add_argument(
+        "--refresh-modules",
+        action="store_true",
+        help="Ignore cached serve/train modules and list them again",
+    )
+    args = parser.parse_args()
+    add, update = not args.no_add, not args.no_update
+    summarize = args.summarize_speed_tests or get_summarize_speed_tests()
+
+    if args.manifest is None and args.discover is None and not args.check:
+        sync(
+            add=add,
+            update=update,
+            refresh_modules=args.refresh_modules,
+            summarize_speed_tests=summarize,
+            reset_journal=args.reset_journal,
+        )
+        return
+    entries = []
+    if args.manifest is not None:
+        entries.extend(load_manifest(args.manifest))
+    if args.manifest is None and args.discover is None:
+        env_entry = get_env_entry()
+        if env_entry["framework"] and env_entry["models_path"]:
+            entries.append(env_entry)
+    if args.discover is not None:
+        entries.extend(
+            {"framework": framework_name, "models_path": path}
+            for framework_name, path, _ in discover_train_configs(args.discover)
+        )
+    if not entries:
+        print("No frameworks found. Models will not be synced.")
+        sys.exit(0)
+    if args.check:
+        _, errors = preflight(entries, summarize)
+        if errors:
+            print_preflight_errors(errors)
+            sys.exit(1)
+        print("Preflight passed.")
+        return
+    client = ModelsClient(SyncConfig.from_env())
+    if args.refresh_modules:
+        client.modules_cache.invalidate()
+    if args.reset_journal:
+        client.journal.reset()
+    if not sync_frameworks(
+        client, entries, add=add, update=update, summarize_speed_tests=summarize
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()